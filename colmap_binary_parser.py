@@ -5,6 +5,7 @@ Reads cameras.bin, images.bin, points3D.bin for measurement system
 Reference: https://colmap.github.io/format.html
 """
 
+import mmap
 import struct
 import numpy as np
 from pathlib import Path
@@ -13,6 +14,14 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Record layouts (little-endian, packed), compiled once
+_U64 = struct.Struct('<Q')
+_CAMERA_PREFIX = struct.Struct('<IiQQ')         # camera_id, model_id, width, height
+_IMAGE_PREFIX = struct.Struct('<I4d3dI')        # image_id, qvec, tvec, camera_id
+_POINT2D = struct.Struct('<ddQ')                # x, y, point3D_id
+_POINT3D_PREFIX = struct.Struct('<Q3d3BdQ')     # point3D_id, xyz, rgb, error, track_length
+_TRACK_ELEM = struct.Struct('<II')              # image_id, point2D_idx
+
 
 class COLMAPBinaryParser:
     """Parse COLMAP binary reconstruction files"""
@@ -26,18 +35,15 @@ class COLMAPBinaryParser:
         cameras = {}
         
         with open(cameras_bin_path, 'rb') as f:
-            num_cameras = struct.unpack('Q', f.read(8))[0]
+            num_cameras = _U64.unpack(f.read(8))[0]
             
             for _ in range(num_cameras):
-                camera_id = struct.unpack('I', f.read(4))[0]
-                model_id = struct.unpack('i', f.read(4))[0]
-                width = struct.unpack('Q', f.read(8))[0]
-                height = struct.unpack('Q', f.read(8))[0]
+                camera_id, model_id, width, height = _CAMERA_PREFIX.unpack(f.read(_CAMERA_PREFIX.size))
                 
                 # Read camera parameters (varies by model)
                 # Simple radial: fx, fy, cx, cy, k
                 num_params = COLMAPBinaryParser._get_num_params(model_id)
-                params = struct.unpack(f'{num_params}d', f.read(8 * num_params))
+                params = struct.unpack(f'<{num_params}d', f.read(8 * num_params))
                 
                 cameras[camera_id] = {
                     'model': model_id,
@@ -57,37 +63,32 @@ class COLMAPBinaryParser:
         """
         images = {}
         
-        with open(images_bin_path, 'rb') as f:
-            num_images = struct.unpack('Q', f.read(8))[0]
+        # Memory-map the file and unpack records in place (no per-field reads)
+        with open(images_bin_path, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            num_images = _U64.unpack_from(mm, 0)[0]
+            offset = _U64.size
             
             for _ in range(num_images):
-                image_id = struct.unpack('I', f.read(4))[0]
-                
-                # Quaternion (rotation)
-                qvec = struct.unpack('4d', f.read(32))
-                
-                # Translation vector
-                tvec = struct.unpack('3d', f.read(24))
-                
-                camera_id = struct.unpack('I', f.read(4))[0]
+                fields = _IMAGE_PREFIX.unpack_from(mm, offset)
+                offset += _IMAGE_PREFIX.size
+                image_id = fields[0]
+                qvec = fields[1:5]  # Quaternion (rotation)
+                tvec = fields[5:8]  # Translation vector
+                camera_id = fields[8]
                 
                 # Image name (null-terminated string)
-                name = b''
-                while True:
-                    char = f.read(1)
-                    if char == b'\x00':
-                        break
-                    name += char
-                name = name.decode('utf-8')
+                name_end = mm.find(b'\x00', offset)
+                name = mm[offset:name_end].decode('utf-8')
+                offset = name_end + 1
                 
                 # 2D points
-                num_points2D = struct.unpack('Q', f.read(8))[0]
-                points2D = []
-                for _ in range(num_points2D):
-                    x = struct.unpack('d', f.read(8))[0]
-                    y = struct.unpack('d', f.read(8))[0]
-                    point3D_id = struct.unpack('Q', f.read(8))[0]
-                    points2D.append((x, y, point3D_id))
+                num_points2D = _U64.unpack_from(mm, offset)[0]
+                offset += _U64.size
+                block_end = offset + num_points2D * _POINT2D.size
+                with memoryview(mm)[offset:block_end] as block:
+                    points2D = list(_POINT2D.iter_unpack(block))
+                offset = block_end
                 
                 images[image_id] = {
                     'qvec': qvec,
@@ -108,28 +109,26 @@ class COLMAPBinaryParser:
         """
         points3D = {}
         
-        with open(points3D_bin_path, 'rb') as f:
-            num_points = struct.unpack('Q', f.read(8))[0]
+        # Memory-map the file and unpack records in place (no per-field reads)
+        with open(points3D_bin_path, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            num_points = _U64.unpack_from(mm, 0)[0]
+            offset = _U64.size
             
             for _ in range(num_points):
-                point3D_id = struct.unpack('Q', f.read(8))[0]
-                
-                # XYZ coordinates
-                xyz = struct.unpack('3d', f.read(24))
-                
-                # RGB color
-                rgb = struct.unpack('3B', f.read(3))
-                
-                # Reconstruction error
-                error = struct.unpack('d', f.read(8))[0]
+                fields = _POINT3D_PREFIX.unpack_from(mm, offset)
+                offset += _POINT3D_PREFIX.size
+                point3D_id = fields[0]
+                xyz = fields[1:4]     # XYZ coordinates
+                rgb = fields[4:7]     # RGB color
+                error = fields[7]     # Reconstruction error
+                track_length = fields[8]
                 
                 # Track (image observations)
-                track_length = struct.unpack('Q', f.read(8))[0]
-                track = []
-                for _ in range(track_length):
-                    image_id = struct.unpack('I', f.read(4))[0]
-                    point2D_idx = struct.unpack('I', f.read(4))[0]
-                    track.append((image_id, point2D_idx))
+                block_end = offset + track_length * _TRACK_ELEM.size
+                with memoryview(mm)[offset:block_end] as block:
+                    track = list(_TRACK_ELEM.iter_unpack(block))
+                offset = block_end
                 
                 points3D[point3D_id] = {
                     'xyz': xyz,
@@ -7,13 +7,71 @@ Based on: https://colmap.github.io/tutorial.html
 
 import subprocess
 import os
+import asyncio
+import re
 import logging
+import functools
+import hashlib
+import json
+import shutil
+import threading
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import sqlite3
+import struct
 from pathlib import Path
+from types import MappingProxyType
 from typing import Dict, Optional, Tuple
-import shutil
 
 logger = logging.getLogger(__name__)
 
+# Parallel frame extraction: videos at least this long (seconds per segment)
+# are split into time segments decoded by concurrent ffmpeg processes
+_EXTRACT_SEGMENT_MIN_SECONDS = 15.0
+_EXTRACT_MAX_SEGMENTS = 4
+
+# RAM-backed scratch for ffmpeg output: only used when it has room for
+# this many bytes per estimated frame (high-quality JPEGs are 1-3MB)
+_SCRATCH_BYTES_PER_FRAME = 3 * 1024 * 1024
+
+# COLMAP binary model files start with a little-endian uint64 record count
+_U64 = struct.Struct('<Q')
+
+# inspect_database results per database path, keyed on the stat of the
+# database and its WAL file (processors are created per API request, so
+# this lives at module level); oldest entries are dropped past the limit
+_INSPECT_CACHE: Dict[str, Tuple[tuple, Dict]] = {}
+_INSPECT_CACHE_MAX = 64
+
+# COLMAP log patterns: first number on a line mentioning both keywords
+# (MULTILINE so they scan a whole log without splitting it into lines)
+_RE_MATCHED_PAIRS = re.compile(r'^(?=.*Matched)(?=.*pairs)[^\d\n]*(\d+)', re.MULTILINE)
+_RE_REGISTERED_IMAGES = re.compile(r'^(?=.*Registered)(?=.*images)[^\d\n]*(\d+)', re.MULTILINE)
+_RE_RECONSTRUCTED_POINTS = re.compile(r'^(?=.*Reconstructed)(?=.*points)[^\d\n]*(\d+)', re.MULTILINE)
+
+# ffmpeg stderr: input duration header and periodic "frame=  123 fps=..." stats
+_RE_FFMPEG_DURATION = re.compile(r'Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)')
+_RE_FFMPEG_FRAME = re.compile(r'^frame=\s*(\d+)')
+
+# COLMAP progress lines: "Processed file [12/300]" (feature_extractor),
+# "Matching image [3/300]" (sequential) / "Matching block [1/4, 1/4]" (exhaustive)
+_RE_FEATURE_PROGRESS = re.compile(r'Processed file \[(\d+)/(\d+)\]')
+_RE_MATCH_PROGRESS = re.compile(r'Matching (?:image|block) \[(\d+)/(\d+)')
+# mapper: "Registering image #12 (13)" - the parenthesized number is the
+# count of images registered in the current model so far
+_RE_MAPPER_PROGRESS = re.compile(r'Registering image #\d+ \((\d+)\)')
+
+# Subprocess output line terminators (ffmpeg redraws its stats line with \r)
+_RE_LINE_BREAK = re.compile(rb'\r\n?|\n')
+
+
+def _last_int(pattern: re.Pattern, output: str) -> Optional[int]:
+    """Number captured by the last line of output matching pattern, if any"""
+    match = None
+    for match in pattern.finditer(output):
+        pass
+    return int(match.group(1)) if match else None
+
 # Import 360° video processing if available
 try:
     from video_processing import detect_360_video, convert_360_to_perspective_frames
@@ -23,9 +81,549 @@ except ImportError:
     logger.warning("360° video support not available (video_processing.py not found)")
 
 
+@functools.lru_cache(maxsize=1)
+def _colmap_env() -> MappingProxyType:
+    """
+    Environment for headless COLMAP runs, built once per process and shared
+    read-only by every processor
+    
+    CUDA's JIT cache is kept warm across jobs: CUDA_CACHE_MAXSIZE is raised
+    to its 4GB maximum (the default evicts compiled patch-match kernels) and
+    COLMAP_CUDA_CACHE_DIR, if set, points CUDA_CACHE_PATH at a persistent
+    volume. Values already in the environment are left untouched.
+    """
+    env = os.environ.copy()
+    env['DISPLAY'] = os.getenv('DISPLAY', ':99')
+    env['QT_QPA_PLATFORM'] = 'offscreen'
+    env['MESA_GL_VERSION_OVERRIDE'] = '3.3'
+    env.setdefault('CUDA_CACHE_MAXSIZE', str(4 * 1024 ** 3))
+    cache_dir = os.getenv('COLMAP_CUDA_CACHE_DIR')
+    if cache_dir:
+        env.setdefault('CUDA_CACHE_PATH', cache_dir)
+    return MappingProxyType(env)
+
+
+@functools.lru_cache(maxsize=1)
+def _gpu_available() -> bool:
+    """
+    Check if GPU is available for COLMAP processing
+    Runs nvidia-smi once per process - GPU presence doesn't change between jobs
+    """
+    try:
+        result = subprocess.run(
+            ["nvidia-smi"], 
+            capture_output=True, 
+            text=True, 
+            timeout=5
+        )
+        if result.returncode == 0:
+            logger.info("✅ GPU detected via nvidia-smi")
+            return True
+        else:
+            logger.warning("⚠️  nvidia-smi failed, falling back to CPU")
+            return False
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.warning(f"⚠️  GPU check failed: {e}, falling back to CPU")
+        return False
+
+
+@functools.lru_cache(maxsize=None)
+def _ffmpeg_has_encoder(encoder: str) -> bool:
+    """
+    Check whether the local ffmpeg build provides the given encoder
+    Probed once per process per encoder
+    """
+    try:
+        result = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-encoders"],
+            capture_output=True,
+            text=True,
+            timeout=10
+        )
+    except (OSError, subprocess.SubprocessError):
+        return False
+    return any(line.split()[1:2] == [encoder] for line in result.stdout.splitlines())
+
+
+@functools.lru_cache(maxsize=1)
+def _qsv_jpeg_available() -> bool:
+    """
+    Check that ffmpeg can encode JPEG on an Intel QSV device
+    Needs the encoder, a DRI render node and a one-frame test encode to succeed;
+    probed once per process (NVIDIA-only and CPU-only hosts fail before spawning)
+    """
+    if not _ffmpeg_has_encoder("mjpeg_qsv") or not any(Path("/dev/dri").glob("renderD*")):
+        return False
+    try:
+        result = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-init_hw_device", "qsv=hw",
+             "-f", "lavfi", "-i", "nullsrc=s=64x64", "-frames:v", "1",
+             "-vf", "format=nv12", "-c:v", "mjpeg_qsv", "-f", "null", "-"],
+            capture_output=True,
+            timeout=15
+        )
+    except (OSError, subprocess.SubprocessError):
+        return False
+    return result.returncode == 0
+
+
+# Set once a QSV JPEG run fails at runtime despite a passing probe, so later
+# extractions in this process go straight to software
+_hw_jpeg_failed = False
+
+# ffmpeg errors that come from the QSV/MFX runtime rather than the input
+_RE_QSV_ERROR = re.compile(r'qsv|mfx', re.IGNORECASE)
+
+
+def _probe_video(video_path: str) -> Tuple[Optional[float], Optional[float], Optional[int]]:
+    """
+    Probe a video's duration, native frame rate and width with one ffprobe call
+    Returns (duration, fps, width); values the container doesn't report are None
+    """
+    result = subprocess.run([
+        "ffprobe", "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries", "format=duration:stream=r_frame_rate,width",
+        "-of", "json",
+        str(video_path)
+    ], check=True, capture_output=True, text=True)
+    probe = json.loads(result.stdout)
+    stream = (probe.get("streams") or [{}])[0]
+    
+    duration = probe.get("format", {}).get("duration")
+    fps = None
+    num, _, den = stream.get("r_frame_rate", "").partition("/")
+    if num and den and float(den) > 0:
+        fps = float(num) / float(den)
+    return (float(duration) if duration else None), fps, stream.get("width")
+
+
+def _with_scheduling(cmd: list) -> list:
+    """
+    Prefix a COLMAP command with optional CPU pinning and priority wrappers,
+    configured from the environment (all unset by default):
+    - COLMAP_CPU_MASK_<SUBCOMMAND>: taskset CPU list, e.g. COLMAP_CPU_MASK_FEATURE_EXTRACTOR=0-1
+    - COLMAP_IONICE_CLASS: ionice scheduling class (2 = best-effort, 3 = idle)
+    - COLMAP_NICE: nice increment
+    Each wrapper execs the next, so no extra processes stay around.
+    """
+    prefix = []
+    cpu_mask = os.getenv(f"COLMAP_CPU_MASK_{cmd[1].upper()}")
+    if cpu_mask:
+        prefix += ["taskset", "-c", cpu_mask]
+    ionice_class = os.getenv("COLMAP_IONICE_CLASS")
+    if ionice_class:
+        prefix += ["ionice", "-c", ionice_class]
+    niceness = os.getenv("COLMAP_NICE")
+    if niceness:
+        prefix += ["nice", "-n", niceness]
+    return prefix + cmd
+
+
+def _throttled_progress(progress_callback, steps: int = 20):
+    """
+    Wrap progress_callback so it only fires when progress crosses the next
+    1/steps of the total - callers persist a status update per report
+    """
+    lock = threading.Lock()
+    last_step = [0]
+    
+    def report(current: int, total: int):
+        if total <= 0:
+            return
+        current = min(current, total)
+        with lock:
+            step = current * steps // total
+            if step > last_step[0]:
+                last_step[0] = step
+                progress_callback(current, total)
+    
+    return report
+
+
+def _run_streaming(cmd: list, env: Optional[Dict] = None, check: bool = True,
+                   line_callback=None, tail_lines: int = 200) -> subprocess.CompletedProcess:
+    """
+    Run a command and stream its combined stdout/stderr line by line
+    
+    Lines are logged at debug level and passed to line_callback as they
+    arrive instead of buffering the whole log in memory. Only the last
+    tail_lines lines are kept, returned as stdout (and attached to
+    CalledProcessError.output when check=True).
+    
+    The pipe is read as bytes: a line is only decoded when something
+    consumes it (a callback or debug logging), so long runs without a
+    callback (patch_match_stereo) never decode their log. Both \r and \n
+    end a line, matching ffmpeg's carriage-return progress updates.
+    """
+    tail = deque(maxlen=tail_lines)
+    log_lines = logger.isEnabledFor(logging.DEBUG)
+    
+    def handle(raw: bytes):
+        raw = raw.rstrip()
+        if not raw:
+            return
+        tail.append(raw)
+        if log_lines or line_callback:
+            line = raw.decode(errors="replace")
+            if log_lines:
+                logger.debug(line)
+            if line_callback:
+                line_callback(line)
+    
+    with subprocess.Popen(
+        cmd,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        env=env
+    ) as proc:
+        pending = b""
+        while True:
+            chunk = proc.stdout.read1(65536)
+            if not chunk:
+                break
+            *lines, pending = _RE_LINE_BREAK.split(pending + chunk)
+            for raw in lines:
+                handle(raw)
+        handle(pending)
+        returncode = proc.wait()
+    
+    output = b"\n".join(tail).decode(errors="replace")
+    if check and returncode != 0:
+        raise subprocess.CalledProcessError(returncode, cmd, output=output)
+    return subprocess.CompletedProcess(cmd, returncode, stdout=output)
+
+
+def _read_bin_count(bin_path: str) -> Optional[int]:
+    """
+    Read the record count header of a COLMAP binary model file
+    (cameras.bin / images.bin / points3D.bin all start with a little-endian
+    uint64 count). Returns None if the file is missing or truncated.
+    """
+    try:
+        fd = os.open(bin_path, os.O_RDONLY)
+    except FileNotFoundError:
+        return None
+    try:
+        header = os.pread(fd, _U64.size, 0)
+    finally:
+        os.close(fd)
+    if len(header) < _U64.size:
+        return None
+    return _U64.unpack_from(header)[0]
+
+
+def _link_frames(src_dir: Path, dst_dir: Path) -> int:
+    """
+    Hardlink every JPEG in src_dir into dst_dir (copying when the two are on
+    different filesystems). Returns the number of frames linked.
+    """
+    count = 0
+    with os.scandir(src_dir) as entries:
+        for entry in entries:
+            if not entry.name.endswith(".jpg"):
+                continue
+            dst = os.path.join(dst_dir, entry.name)
+            if os.path.lexists(dst):
+                os.unlink(dst)
+            try:
+                os.link(entry.path, dst)
+            except OSError:
+                shutil.copyfile(entry.path, dst)
+            count += 1
+    return count
+
+
+def _move_frames(src_dir: Path, dst_dir: Path) -> int:
+    """
+    Move every JPEG in src_dir into dst_dir (a rename on the same filesystem,
+    a copy + unlink across filesystems). Returns the number of frames moved.
+    """
+    count = 0
+    with os.scandir(src_dir) as entries:
+        for entry in entries:
+            if entry.name.endswith(".jpg"):
+                shutil.move(entry.path, os.path.join(dst_dir, entry.name))
+                count += 1
+    return count
+
+
+def _frozen_quality(presets: Dict[str, Dict]) -> MappingProxyType:
+    """Read-only {quality: {param: value}} table, built once at import"""
+    return MappingProxyType({quality: MappingProxyType(params) for quality, params in presets.items()})
+
+
+# Quality-based parameters - OPTIMIZED FOR RTX 4090
+# RTX 4090 has massive compute power - use it!
+_QUALITY_FEATURES = _frozen_quality({
+    "low": {
+        "max_num_features": "16384",    # 2x increase for better reconstruction
+        "max_image_size": "2560",       # Higher resolution even for "low"
+        "first_octave": "-1",           # Extract at higher resolution
+        "num_octaves": "4",             # Standard octave count
+        "peak_threshold": "0.0066",     # Lower = more features
+    },
+    "medium": {
+        "max_num_features": "32768",    # 2x increase - RTX 4090 can handle it
+        "max_image_size": "3840",       # 4K resolution for better detail
+        "first_octave": "-1",           # Extract at higher resolution
+        "num_octaves": "4",
+        "peak_threshold": "0.0066",
+    },
+    "high": {
+        "max_num_features": "65536",    # 2x increase - maximum detail
+        "max_image_size": "4096",       # Full 4K+ resolution
+        "first_octave": "-1",           # Extract at higher resolution
+        "num_octaves": "4",
+        "peak_threshold": "0.0066",
+    },
+    "ultra": {
+        "max_num_features": "81920",   # Extreme feature count
+        "max_image_size": "4096",       # 8K resolution support
+        "first_octave": "-1",           # Always use original resolution
+        "num_octaves": "4",             # More scales
+        "peak_threshold": "0.004",      # Extremely sensitive (finds everything)
+        "edge_threshold": "10",         # Allow slightly more edge-like features
+    }
+})
+
+
+# Quality-based match limits - OPTIMIZED FOR RTX 4090
+# Increased match counts for denser point clouds
+_QUALITY_MATCHES = _frozen_quality({
+    "low": {"max_num_matches": "65536"},     # 2x increase
+    "medium": {"max_num_matches": "131072"}, # 2x increase  
+    "high": {"max_num_matches": "262144"},   # 2x increase - RTX 4090 power
+    "ultra": {"max_num_matches": "262144"}    # Maximum matches
+})
+
+
+# Quality-based overlap strategy for >80% image overlap
+# Higher overlap = better reconstruction quality
+# UNIFIED: All presets now use overlap=100 for maximum coverage
+_QUALITY_OVERLAP = _frozen_quality({
+    "low": {
+        "overlap": "100",  # Match 100 adjacent frames for >80% overlap
+        "use_exhaustive": False
+    },
+    "medium": {
+        "overlap": "100",  # Match 100 adjacent frames for >80% overlap
+        "use_exhaustive": False
+    },
+    "high": {
+        "overlap": "100",  # Match 100 adjacent frames for >80% overlap
+        "use_exhaustive": False
+    },
+    "ultra": {
+        "overlap": "100",  # Match 100 adjacent frames for >80% overlap
+        "use_exhaustive": False,  # Sequential matching (more reliable than exhaustive)
+        "guided_matching": "1"   # Use geometric verification to guide matching
+    }
+})
+
+
+# Quality-based stereo parameters - OPTIMIZED FOR RTX 4090
+# RTX 4090 excels at parallel patch matching - maximize quality
+# Enhanced for 5M-20M point target (ultra quality)
+_QUALITY_STEREO = _frozen_quality({
+    "low": {
+        "window_radius": "5",       # Increased for better detail
+        "window_step": "1",         # Decreased for denser sampling
+        "num_samples": "15",        # 3x increase
+        "num_iterations": "5",      # More refinement
+        "geom_consistency_max_cost": "1.0",  # Stricter filtering
+        "filter_min_ncc": "0.1",    # Normal filtering
+        "cache_size": "64"          # GB - RTX 4090 has 24GB VRAM
+    },
+    "medium": {
+        "window_radius": "7",       # Larger window for better matching
+        "window_step": "1",         # Dense sampling
+        "num_samples": "30",        # 2x increase
+        "num_iterations": "7",      # More iterations = better quality
+        "geom_consistency_max_cost": "0.6",  # Better filtering
+        "filter_min_ncc": "0.2",    # Slightly stricter
+        "cache_size": "64"
+    },
+    "high": {
+        "window_radius": "11",      # Maximum detail capture
+        "window_step": "1",         # Finest sampling
+        "num_samples": "64",        # High sample count
+        "num_iterations": "12",     # Good refinement
+        "geom_consistency_max_cost": "1.0",  # LOOSE filtering for MORE points
+        "filter_min_ncc": "0.05",   # LOOSE threshold for MORE points
+        "cache_size": "64"          # Use all available VRAM
+    },
+    "ultra": {
+        "window_radius": "11",      # Maximum detail
+        "window_step": "1",         # Finest sampling
+        "num_samples": "80",       # Extreme sampling
+        "num_iterations": "10",     # Maximum refinement
+        "geom_consistency_max_cost": "1.2",  # VERY LOOSE filtering for MAX density
+        "filter_min_ncc": "0.08",   # ALMOST NO filtering - keep everything
+        "cache_size": "64",         # Use all available VRAM
+        "geom_consistency_regularizer": "0.3"  # Lower regularization
+    }
+})
+
+
+# Quality-based fusion parameters - fine-tuned for precision and density
+# Enhanced for 5M-20M point target (ultra quality)
+_QUALITY_FUSION = _frozen_quality({
+    "low": {
+        "max_reproj_error": "2.0",      # Reduced for precision
+        "max_depth_error": "0.015",      # Fine-tuned
+        "max_normal_error": "12",        # Fine-tuned
+        "min_num_pixels": "3"            # Lower = more points
+    },
+    "medium": {
+        "max_reproj_error": "1.5",      # Reduced for better precision
+        "max_depth_error": "0.012",      # Fine-tuned for accuracy
+        "max_normal_error": "10",        # Fine-tuned
+        "min_num_pixels": "3"            # Lower = more points
+    },
+    "high": {
+        "max_reproj_error": "4.0",      # Relaxed for more points
+        "max_depth_error": "0.05",       # Relaxed
+        "max_normal_error": "20",         # Relaxed
+        "min_num_pixels": "2"            # Minimum pixels
+    },
+    "ultra": {
+        "max_reproj_error": "3.0",       # Extremely relaxed
+        "max_depth_error": "0.04",      # Extremely relaxed
+        "max_normal_error": "18",         # Extremely relaxed
+        "min_num_pixels": "2",           # Minimum pixels
+        "max_num_pixels": "5000",       # Maximum pixels per point
+        "max_traversal_depth": "100"     # Deep traversal for coverage
+    }
+})
+
+
+# Quality-based mapper parameters - OPTIMIZED FOR RTX 4090
+# Stricter parameters = better sparse model = better dense reconstruction
+_QUALITY_MAPPER = _frozen_quality({
+    "low": {
+        "init_min_num_inliers": "100",   # Doubled for better initialization
+        "min_num_matches": "15",         # Higher minimum for stability
+        "filter_max_reproj_error": "6.0", # Stricter filtering
+        "min_tri_angle": "1.5",         # Minimum triangulation angle
+    },
+    "medium": {
+        "init_min_num_inliers": "150",   # Higher for better quality
+        "min_num_matches": "20",         # More matches required
+        "filter_max_reproj_error": "4.0", # Tighter error threshold
+        "min_tri_angle": "1.5",
+    },
+    "high": {
+        "init_min_num_inliers": "200",   # Maximum quality initialization
+        "min_num_matches": "30",         # Many matches for robustness
+        "filter_max_reproj_error": "2.0", # Very strict for best quality
+        "min_tri_angle": "1.5",
+    },
+    "ultra": {
+        "init_min_num_inliers": "200",   # Maximum quality initialization
+        "min_num_matches": "30",         # Many matches for robustness
+        "filter_max_reproj_error": "2.0", # Very strict for best quality
+        "min_tri_angle": "1.5",         # Minimum triangulation angle for stability
+    }
+})
+
+
+def _stereo_args(quality: str) -> Tuple[str, ...]:
+    """patch_match_stereo flags for one quality preset (everything but paths and GPU)"""
+    params = _QUALITY_STEREO[quality]
+    ultra = quality == "ultra"
+    return (
+        "--workspace_format", "COLMAP",
+        # CRITICAL: Prevent image downsampling - full resolution processing
+        "--DenseMapperOptions.max_image_size", "0",  # 0 = no downsampling
+        # Window parameters - control matching patch size
+        "--PatchMatchStereo.window_radius", params["window_radius"],
+        "--PatchMatchStereo.window_step", params["window_step"],
+        # Sampling parameters - more samples = better quality
+        "--PatchMatchStereo.num_samples", params["num_samples"],
+        "--PatchMatchStereo.num_iterations", params["num_iterations"],
+        # Geometric consistency filtering - removes outliers
+        "--PatchMatchStereo.geom_consistency", "true",
+        "--PatchMatchStereo.geom_consistency_max_cost", params["geom_consistency_max_cost"],
+        # Enhanced geometric consistency for ultra quality
+        *(["--PatchMatchStereo.geom_consistency_regularizer", params.get("geom_consistency_regularizer", "0.3")] 
+          if ultra else []),
+        # NCC filtering - normalized cross correlation threshold
+        "--PatchMatchStereo.filter", "true",
+        "--PatchMatchStereo.filter_min_ncc", params["filter_min_ncc"],
+        "--PatchMatchStereo.filter_min_triangulation_angle", "1.0",
+        "--PatchMatchStereo.filter_min_num_consistent", "2",
+        # Cache size - RTX 4090 has 24GB VRAM, use it!
+        "--PatchMatchStereo.cache_size", params["cache_size"],
+    )
+
+
+def _fusion_args(quality: str) -> Tuple[str, ...]:
+    """stereo_fusion flags for one quality preset (everything but paths)"""
+    params = _QUALITY_FUSION[quality]
+    ultra = quality == "ultra"
+    return (
+        # CRITICAL: Prevent image downsampling during fusion
+        "--DenseMapperOptions.max_image_size", "0",  # 0 = no downsampling
+        # OPTIMIZED FOR MAXIMUM DENSITY AND PRECISION - RTX 4090 can handle it
+        "--StereoFusion.min_num_pixels", params["min_num_pixels"],
+        # Reduced reprojection error for more precise point fusion
+        "--StereoFusion.max_reproj_error", params["max_reproj_error"],
+        # Fine-tuned depth error for better accuracy
+        "--StereoFusion.max_depth_error", params["max_depth_error"],
+        # Fine-tuned normal error for better surface consistency
+        "--StereoFusion.max_normal_error", params["max_normal_error"],
+        # Additional fusion parameters for better quality
+        "--StereoFusion.use_cache", "true",        # Speed up with caching
+        "--StereoFusion.cache_size", "32",         # GB cache for fusion
+        # Ultra quality enhancements
+        *(["--StereoFusion.max_num_pixels", params.get("max_num_pixels", "10000"),
+           "--StereoFusion.max_traversal_depth", params.get("max_traversal_depth", "100")]
+          if ultra else [])
+    )
+
+
+# Everything the reconstruction stages need for one quality, resolved at
+# import: dense argv fragments plus the mapper parameters
+_QualityProfile = namedtuple("_QualityProfile", "stereo_args fusion_args mapper")
+_QUALITY_PROFILE = MappingProxyType({
+    quality: _QualityProfile(_stereo_args(quality), _fusion_args(quality), _QUALITY_MAPPER[quality])
+    for quality in ("low", "medium", "high", "ultra")
+})
+
+
 class COLMAPProcessor:
     """COLMAP 3D Reconstruction Processor"""
     
+    # inspect_database queries - the same string objects every call, so the
+    # cached connection's statement cache serves them without re-preparing
+    # (the window count is evaluated before LIMIT)
+    _SQL_CAMERAS = """
+        SELECT COUNT(*) OVER (), camera_id, model, width, height, params
+        FROM cameras LIMIT 100
+    """
+    # Each table is scanned once, producing its count and average together;
+    # the two_view_geometries scan also computes the inlier ratio, probing
+    # matches by pair_id (the rowid of both tables) as it goes. LEFT JOIN
+    # pins two_view_geometries (the smaller side) as the outer loop - the
+    # planner cannot reorder it into a scan of matches
+    _SQL_COUNTS = """
+        SELECT *
+        FROM (SELECT COUNT(*) FROM images),
+             (SELECT COUNT(*), AVG(rows) FROM keypoints),
+             (SELECT COUNT(*), AVG(rows) FROM matches),
+             (SELECT COUNT(*),
+                     AVG(CASE WHEN tvg.rows > 0 THEN CAST(tvg.rows AS FLOAT) END),
+                     AVG(CASE WHEN tvg.rows > 0 AND m.rows > 0
+                              THEN CAST(tvg.rows AS FLOAT) / CAST(m.rows AS FLOAT) END)
+              FROM two_view_geometries tvg
+              LEFT JOIN matches m ON m.pair_id = tvg.pair_id)
+    """
+    _SQL_IMAGES = "SELECT name, camera_id FROM images LIMIT 50"
+    # Query plan of _SQL_COUNTS is logged once per process at debug level
+    _counts_plan_logged = False
+    
     def __init__(self, job_path: str):
         """
         Initialize COLMAP processor with standard workspace structure
@@ -40,17 +638,96 @@ class COLMAPProcessor:
         self.sparse_path = self.job_path / "sparse"        # Sparse models (0/, 1/, etc.)
         self.dense_path = self.job_path / "dense"          # Dense reconstruction
         
+        # String forms of the paths reused in every COLMAP/ffmpeg argv
+        self._images_path_str = str(self.images_path)
+        self._database_path_str = str(self.database_path)
+        self._sparse_path_str = str(self.sparse_path)
+        
         # Create directories
         self._create_directories()
         
-        # Setup environment for headless COLMAP execution
-        self.env = os.environ.copy()
-        self.env['DISPLAY'] = os.getenv('DISPLAY', ':99')
-        self.env['QT_QPA_PLATFORM'] = 'offscreen'
-        self.env['MESA_GL_VERSION_OVERRIDE'] = '3.3'
+        # Setup environment for headless COLMAP execution (shared, read-only)
+        self.env = _colmap_env()
+        
+        # Detect GPU availability (probed once per process)
+        self.gpu_available = _gpu_available()
+        
+        # Cached SQLite connections to the COLMAP database (opened lazily):
+        # read-write for updates, read-only for inspection/stats queries
+        self._conn = None
+        self._ro_conn = None
+        
+        # Number of frames in images_path, recorded by extract_frames so later
+        # stages don't have to rescan the directory
+        self._image_count = None
         
-        # Detect GPU availability
-        self.gpu_available = self._check_gpu_available()
+        # (sparse_path mtime_ns, best model, stats) from the last _find_best_model
+        # scan; cleared whenever this processor writes a model
+        self._best_model_cache = None
+    
+    def _get_conn(self) -> sqlite3.Connection:
+        """
+        Get the cached connection to the COLMAP database
+        Opened once in autocommit mode with read-tuned PRAGMAs, then reused
+        """
+        if self._conn is None:
+            conn = sqlite3.connect(self.database_path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            # Sized for inspection joins over multi-GB keypoint/match tables
+            conn.execute("PRAGMA cache_size=-262144")  # 256MB page cache
+            conn.execute("PRAGMA mmap_size=1073741824")  # 1GB memory-mapped I/O
+            conn.execute("PRAGMA temp_store=MEMORY")
+            self._conn = conn
+        return self._conn
+    
+    def _get_ro_conn(self) -> sqlite3.Connection:
+        """
+        Get the cached read-only connection used by the inspection helpers
+        
+        Opened with mode=ro: it never takes the write lock or switches the
+        journal mode, so polling stats while COLMAP is still writing the
+        database can't contend with it. Same page cache / mmap sizing as
+        the read-write connection.
+        """
+        if self._ro_conn is None:
+            conn = sqlite3.connect(
+                self.database_path.resolve().as_uri() + "?mode=ro",
+                uri=True, check_same_thread=False, isolation_level=None
+            )
+            conn.execute("PRAGMA query_only=ON")
+            conn.execute("PRAGMA cache_size=-262144")  # 256MB page cache
+            conn.execute("PRAGMA mmap_size=1073741824")  # 1GB memory-mapped I/O
+            conn.execute("PRAGMA temp_store=MEMORY")
+            self._ro_conn = conn
+        return self._ro_conn
+    
+    def _optimize(self):
+        """
+        Refresh query planner statistics on the cached connection
+        PRAGMA optimize only runs ANALYZE on tables whose stats are stale
+        """
+        if self._conn is not None:
+            try:
+                self._conn.execute("PRAGMA optimize")
+            except sqlite3.Error as e:
+                logger.debug(f"PRAGMA optimize skipped: {e}")
+    
+    def close(self):
+        """Close the cached COLMAP database connections"""
+        if self._ro_conn is not None:
+            self._ro_conn.close()
+            self._ro_conn = None
+        if self._conn is not None:
+            self._optimize()
+            self._conn.close()
+            self._conn = None
+    
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
     
     def _create_directories(self):
         """
@@ -61,30 +738,21 @@ class COLMAPProcessor:
         self.sparse_path.mkdir(parents=True, exist_ok=True)
         self.dense_path.mkdir(parents=True, exist_ok=True)
         
+        # Scratch area for ffmpeg output - tmpfs keeps JPEG writes off the
+        # (often slow overlay/network) workspace volume while decoding.
+        # COLMAP_SCRATCH_DIR overrides the /dev/shm default; empty disables it.
+        scratch_root = os.getenv("COLMAP_SCRATCH_DIR", "/dev/shm")
+        self._scratch_root = Path(scratch_root) if scratch_root and os.path.isdir(scratch_root) else None
+        
         logger.info(f"Created COLMAP workspace at {self.job_path}")
     
-    def _check_gpu_available(self) -> bool:
+    def _count_images(self) -> int:
         """
-        Check if GPU is available for COLMAP processing
-        Tests both nvidia-smi and CUDA availability
+        Count extracted JPEG frames in images_path
+        Uses os.scandir directly - no Path object or fnmatch per entry
         """
-        try:
-            # Check if nvidia-smi works
-            result = subprocess.run(
-                ["nvidia-smi"], 
-                capture_output=True, 
-                text=True, 
-                timeout=5
-            )
-            if result.returncode == 0:
-                logger.info("✅ GPU detected via nvidia-smi")
-                return True
-            else:
-                logger.warning("⚠️  nvidia-smi failed, falling back to CPU")
-                return False
-        except (FileNotFoundError, subprocess.TimeoutExpired, Exception) as e:
-            logger.warning(f"⚠️  GPU check failed: {e}, falling back to CPU")
-            return False
+        with os.scandir(self.images_path) as entries:
+            return sum(1 for entry in entries if entry.name.endswith(".jpg"))
     
     def _detect_native_fps(self, video_path: str) -> Tuple[float, float, int]:
         """
@@ -99,29 +767,9 @@ class COLMAPProcessor:
         """
         try:
             # Get video metadata
-            probe_cmd = [
-                "ffprobe", "-v", "error",
-                "-show_entries", "format=duration:stream=r_frame_rate",
-                "-of", "default=noprint_wrappers=1",
-                str(video_path)
-            ]
-            
-            probe_result = subprocess.run(probe_cmd, check=True, capture_output=True, text=True)
-            output_lines = probe_result.stdout.strip().split('\n')
-            
-            # Parse output
-            duration = 0.0
-            native_fps = 24.0  # Common default for most videos
-            
-            for line in output_lines:
-                if 'r_frame_rate' in line or '/' in line:
-                    fps_str = line.split('=')[-1]
-                    if '/' in fps_str:
-                        num, den = fps_str.split('/')
-                        if float(den) > 0:
-                            native_fps = float(num) / float(den)
-                elif 'duration' in line:
-                    duration = float(line.split('=')[-1])
+            duration, native_fps, _ = _probe_video(video_path)
+            duration = duration or 0.0
+            native_fps = native_fps or 24.0  # Common default for most videos
             
             # Round to common FPS values (24, 25, 30, 60)
             common_fps = [24, 25, 30, 60]
@@ -158,6 +806,7 @@ class COLMAPProcessor:
             quality: Quality preset (low/medium/high) - affects target frame count
             is_360: If True, treat as 360° video and convert to perspective frames
         """
+        global _hw_jpeg_failed
         # Check for 360° video if not explicitly set
         if not is_360 and HAS_360_SUPPORT:
             try:
@@ -185,12 +834,13 @@ class COLMAPProcessor:
                 
                 frame_count = convert_360_to_perspective_frames(
                     video_path,
-                    str(self.images_path),
+                    self._images_path_str,
                     target_fps=int(extraction_fps),
                     num_views=num_views
                 )
                 logger.info(f"✅ Extracted {frame_count} perspective frames from 360° video")
                 logger.info(f"   Strategy: 1 FPS × {num_views} views = complete 360° coverage")
+                self._image_count = frame_count
                 return frame_count
             except Exception as e:
                 logger.error(f"❌ 360° conversion failed: {e}")
@@ -198,31 +848,15 @@ class COLMAPProcessor:
         
         logger.info(f"📹 Extracting frames from {video_path} (quality={quality})")
         
+        native_width = None  # Source width, known when the video is probed
+        
         # Use target_fps if provided, otherwise auto-detect
         if target_fps is None:
             # Get video metadata first
             try:
-                probe_cmd = [
-                    "ffprobe", "-v", "error",
-                    "-show_entries", "format=duration:stream=r_frame_rate",
-                    "-of", "default=noprint_wrappers=1",
-                    str(video_path)
-                ]
-                probe_result = subprocess.run(probe_cmd, check=True, capture_output=True, text=True)
-                output_lines = probe_result.stdout.strip().split('\n')
-                
-                duration = 30.0  # Default
-                native_fps = 24.0  # Default
-                
-                for line in output_lines:
-                    if 'r_frame_rate' in line or '/' in line:
-                        fps_str = line.split('=')[-1]
-                        if '/' in fps_str:
-                            num, den = fps_str.split('/')
-                            if float(den) > 0:
-                                native_fps = float(num) / float(den)
-                    elif 'duration' in line:
-                        duration = float(line.split('=')[-1])
+                duration, native_fps, native_width = _probe_video(video_path)
+                duration = duration or 30.0  # Default
+                native_fps = native_fps or 24.0  # Default
                 
                 logger.info(f"📹 Video: {duration:.1f}s @ {native_fps:.0f} fps")
                 
@@ -239,24 +873,12 @@ class COLMAPProcessor:
                 duration = 30.0
                 estimated_frames = 720
         else:
-            # Manual FPS override
-            try:
-                probe_cmd = [
-                    "ffprobe", "-v", "error",
-                    "-show_entries", "format=duration",
-                    "-of", "default=noprint_wrappers=1:nokey=1",
-                    str(video_path)
-                ]
-                probe_result = subprocess.run(probe_cmd, check=True, capture_output=True, text=True)
-                duration = float(probe_result.stdout.strip())
-                actual_fps = target_fps
-                estimated_frames = max(int(duration * actual_fps), 10)
-                logger.info(f"📹 Manual FPS: {actual_fps} fps → ~{estimated_frames} frames")
-            except Exception as e:
-                logger.warning(f"Could not detect video duration: {e}")
-                actual_fps = target_fps
-                duration = 30.0
-                estimated_frames = max(int(30 * target_fps), 10)
+            # Manual FPS override - no probe needed; the duration (and with it
+            # the frame estimate) is read from ffmpeg's own stderr as it runs
+            actual_fps = target_fps
+            duration = None
+            estimated_frames = 0
+            logger.info(f"📹 Manual FPS: {actual_fps} fps")
         
         # Quality-based scaling
         scale_map = {
@@ -268,53 +890,255 @@ class COLMAPProcessor:
         }
         scale = scale_map.get(quality, "1920:-2")
         
+        # Skip the swscale pass when the source is already at (within 2%) or
+        # below the target width - upscaling adds no detail for SIFT
+        target_width = int(scale.split(":")[0])
+        if native_width and native_width <= target_width * 1.02:
+            logger.info(f"📐 Source width {native_width}px is within target {target_width}px - skipping rescale")
+            scale = None
+        # Bilinear is ~2x cheaper than swscale's default bicubic and keeps the
+        # area averaging that fast_bilinear drops (aliasing would cost SIFT matches)
+        video_filter = f"fps={actual_fps}" if scale is None else f"fps={actual_fps},scale={scale}:flags=bilinear"
+        
+        # Skip extraction on warm runs: frames already extracted from the same
+        # video (path + mtime) with the same fps/scale/limit are reused as-is
+        stamp_path = self.job_path / ".extract.stamp"
+        try:
+            stamp_key = hashlib.blake2b(
+                f"{video_path}|{os.path.getmtime(video_path)}|{video_filter}|{max_frames}".encode()
+            ).hexdigest()
+        except OSError:
+            stamp_key = None
+        
+        if stamp_key and stamp_path.exists():
+            try:
+                cached_key, cached_count = stamp_path.read_text().split()
+                cached_count = int(cached_count)
+                if cached_key == stamp_key and cached_count >= 3 and \
+                        self._count_images() == cached_count:
+                    logger.info(f"♻️  Reusing {cached_count} previously extracted frames in {self.images_path}")
+                    if progress_callback:
+                        progress_callback(cached_count, cached_count)
+                    self._image_count = cached_count
+                    return cached_count
+            except ValueError:
+                pass  # Malformed stamp - re-extract
+            stamp_path.unlink()  # Frames are about to be overwritten
+        
+        # Shared extraction cache across jobs (opt-in via COLMAP_EXTRACT_CACHE_DIR):
+        # frames of an identical video + settings are hardlinked in, not re-decoded
+        cache_dir = None
+        cache_root = os.getenv("COLMAP_EXTRACT_CACHE_DIR")
+        if cache_root:
+            try:
+                video_stat = os.stat(video_path)
+                cache_key = hashlib.sha256(
+                    f"{os.path.abspath(video_path)}|{video_stat.st_mtime_ns}|{video_stat.st_size}|"
+                    f"{video_filter}|{max_frames}".encode()
+                ).hexdigest()[:32]
+                cache_dir = Path(cache_root) / f"v1-{cache_key}"
+            except OSError as e:
+                logger.warning(f"⚠️  Frame cache disabled for this video: {e}")
+        
+        if cache_dir and (cache_dir / ".hf-complete").exists():
+            frame_count = _link_frames(cache_dir, self.images_path)
+            if frame_count >= 3:
+                logger.info(f"♻️  Linked {frame_count} cached frames from {cache_dir}")
+                if stamp_key:
+                    stamp_path.write_text(f"{stamp_key} {frame_count}\n")
+                if progress_callback:
+                    progress_callback(frame_count, frame_count)
+                self._image_count = frame_count
+                return frame_count
+        
+        # ffmpeg writes into the scratch area when it has room for the estimated
+        # output; frames are moved into images/ once extraction succeeds
+        frames_dir = self.images_path
+        if self._scratch_root and estimated_frames > 0:
+            try:
+                if shutil.disk_usage(self._scratch_root).free > estimated_frames * _SCRATCH_BYTES_PER_FRAME:
+                    frames_dir = self._scratch_root / f"metroa-{self.job_path.name}" / "images"
+                    shutil.rmtree(frames_dir, ignore_errors=True)
+                    frames_dir.mkdir(parents=True)
+            except OSError as e:
+                logger.warning(f"⚠️  Scratch directory unavailable, writing frames directly: {e}")
+                frames_dir = self.images_path
+        
         # Extract frames with uniform naming (COLMAP requirement)
         # Format: %06d for frame numbering
-        output_pattern = self.images_path / "frame_%06d.jpg"
+        output_pattern = frames_dir / "frame_%06d.jpg"
         
         # Call progress callback at start
         if progress_callback:
             progress_callback(0, estimated_frames)
         
-        # Use fps filter to extract at specified FPS
-        cmd = [
-            "ffmpeg", "-i", video_path,
-            "-vf", f"fps={actual_fps},scale={scale}",
-            "-q:v", "2",  # High quality JPEG (1-31, lower = better)
-            "-y",  # Overwrite existing files
-            str(output_pattern)
-        ]
+        # Hardware JPEG encoder ignores -q:v, so drive its own rate control instead
+        use_hw_jpeg = not _hw_jpeg_failed and _qsv_jpeg_available()
+        
+        # Long videos without a frame limit are decoded as parallel time segments,
+        # each by its own ffmpeg process, then renumbered into one sequence
+        # (needs the duration up front, so not for unprobed manual-FPS runs)
+        num_segments = 1
+        if max_frames <= 0 and duration:
+            num_segments = max(1, min(
+                os.cpu_count() or 1,
+                _EXTRACT_MAX_SEGMENTS,
+                int(duration // _EXTRACT_SEGMENT_MIN_SECONDS)
+            ))
+        # Segments cover a whole number of output frame intervals, so each
+        # segment's fps grid restarts exactly on the single-run sample times;
+        # the last segment takes the remainder
+        segment_length = None
+        if num_segments > 1:
+            frames_per_segment = int(duration * actual_fps) // num_segments
+            segment_length = frames_per_segment / actual_fps
+        
+        # Live progress from ffmpeg's stderr stats, reported in ~5% steps
+        decoded = [0] * num_segments
+        report_progress = _throttled_progress(progress_callback) if progress_callback else None
+        
+        def on_ffmpeg_line(segment: int, line: str):
+            nonlocal duration, estimated_frames
+            match = _RE_FFMPEG_FRAME.match(line)
+            if match:
+                decoded[segment] = int(match.group(1))
+                if report_progress:
+                    report_progress(sum(decoded), estimated_frames)
+            elif duration is None:
+                match = _RE_FFMPEG_DURATION.search(line)
+                if match:
+                    hours, minutes, seconds = match.groups()
+                    duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+                    estimated_frames = max(int(duration * actual_fps), 10)
+                    logger.info(f"📹 Video: {duration:.1f}s → ~{estimated_frames} frames")
+        
+        # Split the cores between concurrently running segment processes
+        filter_threads = max(1, (os.cpu_count() or 1) // num_segments)
+        
+        def build_cmd(hw_jpeg: bool, segment: Optional[int] = None) -> list:
+            # Use fps filter to extract at specified FPS
+            encoder_args = (
+                ["-c:v", "mjpeg_qsv", "-global_quality", "85"] if hw_jpeg
+                # High quality JPEG (1-31, lower = better); the standard Huffman
+                # tables skip mjpeg's per-frame table-optimization pass (same pixels)
+                else ["-q:v", "2", "-huffman", "default"]
+            )
+            if segment is None:
+                input_args = ["-i", video_path]
+                pattern = output_pattern
+            else:
+                # -ss before -i seeks on the demuxer; last segment runs to the end
+                input_args = ["-ss", f"{segment * segment_length:.6f}"]
+                if segment < num_segments - 1:
+                    input_args += ["-t", f"{segment_length:.6f}"]
+                input_args += ["-i", video_path]
+                pattern = frames_dir / f"seg{segment:02d}_%06d.jpg"
+            cmd = [
+                "ffmpeg",
+                "-threads", "0",  # Auto-threaded decode
+                *input_args,
+                "-vf", video_filter,
+                "-filter_threads", str(filter_threads),
+                *encoder_args,
+                "-y",  # Overwrite existing files
+                str(pattern)
+            ]
+            
+            # Add frame limit only if specified (max_frames > 0)
+            if max_frames > 0:
+                cmd.insert(-2, "-frames:v")
+                cmd.insert(-2, str(max_frames))
+            return cmd
+        
+        def run_extraction(hw_jpeg: bool):
+            decoded[:] = [0] * num_segments
+            if num_segments == 1:
+                cmd = build_cmd(hw_jpeg)
+                return cmd, _run_streaming(cmd, line_callback=functools.partial(on_ffmpeg_line, 0))
+            
+            for stale in frames_dir.glob("seg[0-9][0-9]_*.jpg"):
+                stale.unlink()
+            cmds = [build_cmd(hw_jpeg, segment) for segment in range(num_segments)]
+            with ThreadPoolExecutor(max_workers=num_segments) as pool:
+                results = list(pool.map(
+                    lambda segment: _run_streaming(
+                        cmds[segment], line_callback=functools.partial(on_ffmpeg_line, segment)
+                    ),
+                    range(num_segments)
+                ))
+            
+            # Renumber seg00_*, seg01_*, ... into one contiguous frame_%06d sequence
+            # (sorted names keep temporal order for the sequential matcher)
+            segment_frames = sorted(frames_dir.glob("seg[0-9][0-9]_*.jpg"))
+            for index, frame in enumerate(segment_frames, start=1):
+                frame.rename(frames_dir / f"frame_{index:06d}.jpg")
+            return cmds[0], subprocess.CompletedProcess(
+                cmds[0], 0, stdout="\n".join(r.stdout for r in results)
+            )
         
-        # Add frame limit only if specified (max_frames > 0)
-        if max_frames > 0:
-            cmd.insert(-2, "-frames:v")
-            cmd.insert(-2, str(max_frames))
+        if num_segments > 1:
+            logger.info(f"⚡ Decoding {duration:.1f}s video as {num_segments} parallel segments")
+        cmd = build_cmd(use_hw_jpeg)
         
         try:
-            result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+            try:
+                cmd, result = run_extraction(use_hw_jpeg)
+            except subprocess.CalledProcessError as e:
+                # Only a QSV runtime error warrants a software retry; a bad
+                # input would just fail again
+                if not use_hw_jpeg or not _RE_QSV_ERROR.search(e.output or ""):
+                    raise
+                _hw_jpeg_failed = True
+                logger.warning(f"⚠️  Hardware JPEG encoding failed, retrying with software encoder: {e.output}")
+                cmd, result = run_extraction(False)
+            
+            if frames_dir != self.images_path:
+                _move_frames(frames_dir, self.images_path)
             
             # Count extracted frames
-            frame_count = len(list(self.images_path.glob("*.jpg")))
+            frame_count = self._count_images()
             
             # CRITICAL: Ensure we have enough frames for COLMAP
             if frame_count < 3:
                 logger.error(f"❌ Only {frame_count} frames extracted - COLMAP needs at least 3")
                 logger.error(f"ffmpeg command: {' '.join(cmd)}")
-                logger.error(f"ffmpeg stderr: {result.stderr}")
-                logger.error(f"Video: {video_path}, FPS: {actual_fps}, Duration: {duration:.1f}s")
+                logger.error(f"ffmpeg stderr: {result.stdout}")
+                logger.error(f"Video: {video_path}, FPS: {actual_fps}, Duration: {duration or 0:.1f}s")
                 raise RuntimeError(f"Frame extraction failed: only {frame_count} frames (need 3+)")
             
+            # Record what was extracted so identical re-runs can skip ffmpeg
+            if stamp_key:
+                stamp_path.write_text(f"{stamp_key} {frame_count}\n")
+            
+            # Publish to the shared cache: fill a private directory, mark it
+            # complete, then rename it into place so readers never see a partial set
+            if cache_dir and not cache_dir.exists():
+                staging_dir = cache_dir.with_name(f"{cache_dir.name}.tmp{os.getpid()}")
+                try:
+                    staging_dir.mkdir(parents=True, exist_ok=True)
+                    _link_frames(self.images_path, staging_dir)
+                    (staging_dir / ".hf-complete").touch()
+                    staging_dir.rename(cache_dir)
+                    logger.info(f"💾 Cached {frame_count} frames in {cache_dir}")
+                except OSError as e:
+                    logger.warning(f"⚠️  Could not cache extracted frames: {e}")
+                    shutil.rmtree(staging_dir, ignore_errors=True)
+            
             # Call progress callback at completion
             if progress_callback:
                 progress_callback(frame_count, frame_count)
             
             logger.info(f"✅ Extracted {frame_count} frames to {self.images_path}")
+            self._image_count = frame_count
             return frame_count
             
         except subprocess.CalledProcessError as e:
-            logger.error(f"❌ Frame extraction failed: {e.stderr}")
+            logger.error(f"❌ Frame extraction failed: {e.output}")
             logger.error(f"ffmpeg command: {' '.join(cmd)}")
-            raise RuntimeError(f"FFmpeg failed: {e.stderr}")
+            raise RuntimeError(f"FFmpeg failed: {e.output}")
+        finally:
+            if frames_dir != self.images_path:
+                shutil.rmtree(frames_dir.parent, ignore_errors=True)
     
     def extract_features(self, quality: str = "medium", use_gpu: bool = True, progress_callback=None) -> Dict:
         """
@@ -329,124 +1153,104 @@ class COLMAPProcessor:
         gpu_mode = "GPU" if actual_use_gpu else "CPU"
         logger.info(f"Extracting features with quality={quality} using {gpu_mode}")
         
-        # Quality-based parameters - OPTIMIZED FOR RTX 4090
-        # RTX 4090 has massive compute power - use it!
-        quality_params = {
-            "low": {
-                "max_num_features": "16384",    # 2x increase for better reconstruction
-                "max_image_size": "2560",       # Higher resolution even for "low"
-                "first_octave": "-1",           # Extract at higher resolution
-                "num_octaves": "4",             # Standard octave count
-                "peak_threshold": "0.0066",     # Lower = more features
-            },
-            "medium": {
-                "max_num_features": "32768",    # 2x increase - RTX 4090 can handle it
-                "max_image_size": "3840",       # 4K resolution for better detail
-                "first_octave": "-1",           # Extract at higher resolution
-                "num_octaves": "4",
-                "peak_threshold": "0.0066",
-            },
-            "high": {
-                "max_num_features": "65536",    # 2x increase - maximum detail
-                "max_image_size": "4096",       # Full 4K+ resolution
-                "first_octave": "-1",           # Extract at higher resolution
-                "num_octaves": "4",
-                "peak_threshold": "0.0066",
-            },
-            "ultra": {
-                "max_num_features": "81920",   # Extreme feature count
-                "max_image_size": "4096",       # 8K resolution support
-                "first_octave": "-1",           # Always use original resolution
-                "num_octaves": "4",             # More scales
-                "peak_threshold": "0.004",      # Extremely sensitive (finds everything)
-                "edge_threshold": "10",         # Allow slightly more edge-like features
-            }
+        params = _QUALITY_FEATURES.get(quality, _QUALITY_FEATURES["medium"])
+        
+        # Enhanced COLMAP parameters for maximum quality, as --<option> <value> pairs
+        options = {
+            "database_path": self._database_path_str,
+            "image_path": self._images_path_str,
+            "ImageReader.single_camera": "1",  # All frames from same camera
+            "ImageReader.camera_model": "OPENCV",  # Use OpenCV camera model
+            "SiftExtraction.max_num_features": params["max_num_features"],
+            "SiftExtraction.max_image_size": params["max_image_size"],
+            "SiftExtraction.first_octave": params["first_octave"],  # Extract at higher resolution
+            "SiftExtraction.num_octaves": params["num_octaves"],
+            "SiftExtraction.octave_resolution": "3",
+            "SiftExtraction.peak_threshold": params["peak_threshold"],  # Lower = more features
+            "SiftExtraction.edge_threshold": "10",
+            "SiftExtraction.use_gpu": "1" if actual_use_gpu else "0",  # GPU control
+            "SiftExtraction.gpu_index": "0",
         }
         
-        params = quality_params.get(quality, quality_params["medium"])
+        # Get image count for progress tracking (recorded by extract_frames)
+        image_count = self._image_count or self._count_images()
         
-        # Build command with enhanced COLMAP parameters for maximum quality
-        cmd = [
-            "colmap", "feature_extractor",
-            "--database_path", str(self.database_path),
-            "--image_path", str(self.images_path),
-            "--ImageReader.single_camera", "1",  # All frames from same camera
-            "--ImageReader.camera_model", "OPENCV",  # Use OpenCV camera model
-            "--SiftExtraction.max_num_features", params["max_num_features"],
-            "--SiftExtraction.max_image_size", params["max_image_size"],
-            "--SiftExtraction.first_octave", params["first_octave"],  # Extract at higher resolution
-            "--SiftExtraction.num_octaves", params["num_octaves"],
-            "--SiftExtraction.octave_resolution", "3",
-            "--SiftExtraction.peak_threshold", params["peak_threshold"],  # Lower = more features
-            "--SiftExtraction.edge_threshold", "10",
-            "--SiftExtraction.use_gpu", "1" if actual_use_gpu else "0",  # GPU control
-            "--SiftExtraction.gpu_index", "0",
-        ]
+        # Live progress from COLMAP's "Processed file [i/n]" log lines; lines the
+        # stats parser needs are kept as they stream past (the log tail is bounded)
+        report_progress = _throttled_progress(progress_callback) if progress_callback else None
+        summary_lines = []
         
-        try:
-            # Get image count for progress tracking
-            image_count = len(list(self.images_path.glob("*.jpg")))
-            if progress_callback:
-                progress_callback(0, image_count)
-            
-            result = subprocess.run(cmd, check=True, capture_output=True, text=True, env=self.env)
+        def on_line(line: str):
+            if "Database" in line:
+                summary_lines.append(line)
+            match = _RE_FEATURE_PROGRESS.search(line)
+            if match and report_progress:
+                report_progress(int(match.group(1)), int(match.group(2)))
+        
+        if progress_callback:
+            progress_callback(0, image_count)
+        
+        # Run with the requested settings; each failure either relaxes one
+        # setting (GPU -> CPU, unbounded -> 8192px images) and retries, or raises
+        fallback = False
+        while True:
+            cmd = self._colmap_cmd("feature_extractor", options)
+            summary_lines.clear()
+            try:
+                _run_streaming(cmd, env=self.env, line_callback=on_line)
+            except subprocess.CalledProcessError as e:
+                # Log full error details for debugging
+                error_output = e.output or "No error output"
+                logger.error(f"❌ Feature extraction failed (exit code {e.returncode})")
+                logger.error(f"Command: {' '.join(cmd)}")
+                logger.error(f"Error output: {error_output}")
+                
+                # If GPU was attempted and failed, try CPU fallback
+                if options["SiftExtraction.use_gpu"] == "1" and ("GPU" in error_output or "CUDA" in error_output):
+                    logger.warning(f"⚠️  GPU feature extraction failed, retrying with CPU...")
+                    self.gpu_available = False  # Disable GPU for future calls
+                    options["SiftExtraction.use_gpu"] = "0"
+                    continue
+                
+                # If max_image_size might be the issue, try with a reasonable limit
+                max_image_size = options["SiftExtraction.max_image_size"]
+                if max_image_size == "0" or int(max_image_size) > 8192:
+                    logger.warning(f"⚠️  Feature extraction failed with max_image_size={max_image_size}, retrying with 8192...")
+                    options["SiftExtraction.max_image_size"] = "8192"
+                    fallback = True
+                    continue
+                
+                # Re-raise with full error details
+                raise Exception(f"Feature extraction failed: {error_output}")
             
             # Parse statistics
-            stats = self._parse_feature_stats(result.stdout)
+            stats = self._parse_feature_stats("\n".join(summary_lines))
             
             if progress_callback:
                 progress_callback(image_count, image_count)
             
-            logger.info(f"Feature extraction complete: {stats}")
+            if fallback:
+                logger.info(f"✅ Feature extraction succeeded with fallback parameters: {stats}")
+            else:
+                logger.info(f"Feature extraction complete: {stats}")
             return stats
-            
-        except subprocess.CalledProcessError as e:
-            # Log full error details for debugging
-            error_output = e.stderr if e.stderr else e.stdout if e.stdout else "No error output"
-            logger.error(f"❌ Feature extraction failed (exit code {e.returncode})")
-            logger.error(f"Command: {' '.join(cmd)}")
-            logger.error(f"Error output: {error_output}")
-            
-            # If GPU was attempted and failed, try CPU fallback
-            if actual_use_gpu and ("GPU" in str(error_output) or "CUDA" in str(error_output)):
-                logger.warning(f"⚠️  GPU feature extraction failed, retrying with CPU...")
-                self.gpu_available = False  # Disable GPU for future calls
-                return self.extract_features(quality=quality, use_gpu=False, progress_callback=progress_callback)
-            
-            # If max_image_size might be the issue, try with a reasonable limit
-            if params["max_image_size"] == "0" or int(params.get("max_image_size", 4096)) > 8192:
-                logger.warning(f"⚠️  Feature extraction failed with max_image_size={params['max_image_size']}, retrying with 8192...")
-                # Create fallback params
-                fallback_params = params.copy()
-                fallback_params["max_image_size"] = "8192"
-                fallback_cmd = [
-                    "colmap", "feature_extractor",
-                    "--database_path", str(self.database_path),
-                    "--image_path", str(self.images_path),
-                    "--ImageReader.single_camera", "1",
-                    "--ImageReader.camera_model", "OPENCV",
-                    "--SiftExtraction.max_num_features", fallback_params["max_num_features"],
-                    "--SiftExtraction.max_image_size", fallback_params["max_image_size"],
-                    "--SiftExtraction.first_octave", fallback_params["first_octave"],
-                    "--SiftExtraction.num_octaves", fallback_params["num_octaves"],
-                    "--SiftExtraction.octave_resolution", "3",
-                    "--SiftExtraction.peak_threshold", fallback_params["peak_threshold"],
-                    "--SiftExtraction.edge_threshold", "10",
-                    "--SiftExtraction.use_gpu", "1" if actual_use_gpu else "0",
-                    "--SiftExtraction.gpu_index", "0",
-                ]
-                try:
-                    result = subprocess.run(fallback_cmd, check=True, capture_output=True, text=True, env=self.env)
-                    stats = self._parse_feature_stats(result.stdout)
-                    if progress_callback:
-                        progress_callback(image_count, image_count)
-                    logger.info(f"✅ Feature extraction succeeded with fallback parameters: {stats}")
-                    return stats
-                except subprocess.CalledProcessError as fallback_error:
-                    logger.error(f"❌ Fallback also failed: {fallback_error.stderr}")
-            
-            # Re-raise with full error details
-            raise Exception(f"Feature extraction failed: {error_output}")
+    
+    def _colmap_cmd(self, subcommand: str, options: Dict[str, str]) -> list:
+        """
+        Build a COLMAP command line from {"Section.option": value} pairs
+        (top-level options such as database_path have no section)
+        """
+        cmd = ["colmap", subcommand]
+        for option, value in options.items():
+            cmd += [f"--{option}", value]
+        return _with_scheduling(cmd)
+    
+    def _matcher_cmd(self, kind: str, extra_options: Dict[str, str], base_options: Dict[str, str]) -> list:
+        """
+        Build a COLMAP matcher command line
+        kind is the matcher subcommand; base_options are the shared SiftMatching.* options
+        """
+        return self._colmap_cmd(kind, {"database_path": self._database_path_str, **extra_options, **base_options})
     
     def match_features(self, matching_type: str = "sequential", use_gpu: bool = True, quality: str = "medium", progress_callback=None) -> Dict:
         """
@@ -473,134 +1277,126 @@ class COLMAPProcessor:
         gpu_mode = "GPU" if actual_use_gpu else "CPU"
         logger.info(f"Matching features with {matching_type} matcher (quality={quality}) using {gpu_mode}")
         
-        # Quality-based match limits - OPTIMIZED FOR RTX 4090
-        # Increased match counts for denser point clouds
-        quality_params = {
-            "low": {"max_num_matches": "65536"},     # 2x increase
-            "medium": {"max_num_matches": "131072"}, # 2x increase  
-            "high": {"max_num_matches": "262144"},   # 2x increase - RTX 4090 power
-            "ultra": {"max_num_matches": "262144"}    # Maximum matches
-        }
-        match_params = quality_params.get(quality, quality_params["medium"])
-        
-        # Quality-based overlap strategy for >80% image overlap
-        # Higher overlap = better reconstruction quality
-        # UNIFIED: All presets now use overlap=100 for maximum coverage
-        overlap_params = {
-            "low": {
-                "overlap": "100",  # Match 100 adjacent frames for >80% overlap
-                "use_exhaustive": False
-            },
-            "medium": {
-                "overlap": "100",  # Match 100 adjacent frames for >80% overlap
-                "use_exhaustive": False
-            },
-            "high": {
-                "overlap": "100",  # Match 100 adjacent frames for >80% overlap
-                "use_exhaustive": False
-            },
-            "ultra": {
-                "overlap": "100",  # Match 100 adjacent frames for >80% overlap
-                "use_exhaustive": False,  # Sequential matching (more reliable than exhaustive)
-                "guided_matching": "1"   # Use geometric verification to guide matching
-            }
-        }
-        overlap_config = overlap_params.get(quality, overlap_params["medium"])
+        match_params = _QUALITY_MATCHES.get(quality, _QUALITY_MATCHES["medium"])
+        overlap_config = _QUALITY_OVERLAP.get(quality, _QUALITY_OVERLAP["medium"])
         
         # Enhanced matching parameters for robust feature matching
-        matching_base_params = [
-            "--SiftMatching.max_ratio", "0.9",      # Loose ratio for more matches (RANSAC will clean up)
-            "--SiftMatching.max_distance", "0.9",   # Allow distant matches
-            "--SiftMatching.cross_check", "1",      # Keep cross-check for reliability
-            "--SiftMatching.use_gpu", "1" if actual_use_gpu else "0",
-            "--SiftMatching.gpu_index", "0",
-            "--SiftMatching.max_num_matches", match_params["max_num_matches"],
-            *(["--SiftMatching.guided_matching", "1"] if overlap_config.get("guided_matching") == "1" else [])
-        ]
+        matching_base_options = {
+            "SiftMatching.max_ratio": "0.9",      # Loose ratio for more matches (RANSAC will clean up)
+            "SiftMatching.max_distance": "0.9",   # Allow distant matches
+            "SiftMatching.cross_check": "1",      # Keep cross-check for reliability
+            "SiftMatching.use_gpu": "1" if actual_use_gpu else "0",
+            "SiftMatching.gpu_index": "0",
+            "SiftMatching.max_num_matches": match_params["max_num_matches"],
+        }
+        if overlap_config.get("guided_matching") == "1":
+            matching_base_options["SiftMatching.guided_matching"] = "1"
         
         # Matching strategy selection
         # Ultra quality: Try exhaustive first (maximum quality), fallback to sequential
         # High quality: Use sequential with high overlap (more reliable)
         # Medium/Low: Use sequential with moderate overlap
-        if overlap_config["use_exhaustive"] or matching_type == "exhaustive":
+        exhaustive = overlap_config["use_exhaustive"] or matching_type == "exhaustive"
+        if exhaustive:
             logger.info(f"🎯 Using EXHAUSTIVE matching for maximum overlap (quality={quality})")
-            cmd = [
-                "colmap", "exhaustive_matcher",
-                "--database_path", str(self.database_path),
-            ] + matching_base_params
+            kind, extra_options = "exhaustive_matcher", {}
         else:  # sequential_matcher with high overlap
             overlap_value = overlap_config["overlap"]
             logger.info(f"🎯 Using SEQUENTIAL matching with overlap={overlap_value} for reliable coverage (quality={quality})")
-            cmd = [
-                "colmap", "sequential_matcher",
-                "--database_path", str(self.database_path),
-                "--SequentialMatching.overlap", overlap_value,  # Match many adjacent frames for high overlap
-            ] + matching_base_params
+            # Match many adjacent frames for high overlap
+            kind, extra_options = "sequential_matcher", {"SequentialMatching.overlap": overlap_value}
+        
+        # Estimate image pairs for progress tracking (image count recorded by extract_frames)
+        image_count = self._image_count or self._count_images()
+        if overlap_config["use_exhaustive"]:
+            # Exhaustive: n*(n-1)/2 pairs
+            estimated_pairs = (image_count * (image_count - 1)) // 2
+        else:
+            # Sequential: overlap * image_count
+            estimated_pairs = int(overlap_config["overlap"]) * image_count
+        
+        # Live progress from COLMAP's "Matching image/block [i/n" log lines,
+        # scaled onto the estimated pair count; lines the stats parser needs
+        # are kept as they stream past (the log tail is bounded)
+        report_progress = _throttled_progress(progress_callback) if progress_callback else None
+        summary_lines = []
+        
+        def on_line(line: str):
+            if "Database" in line or _RE_MATCHED_PAIRS.match(line):
+                summary_lines.append(line)
+            match = _RE_MATCH_PROGRESS.search(line)
+            if match and report_progress:
+                done, total = int(match.group(1)), int(match.group(2))
+                if total > 0:
+                    report_progress(estimated_pairs * done // total, estimated_pairs)
         
-        try:
-            # Estimate image pairs for progress tracking
-            image_count = len(list(self.images_path.glob("*.jpg")))
-            if overlap_config["use_exhaustive"]:
-                # Exhaustive: n*(n-1)/2 pairs
-                estimated_pairs = (image_count * (image_count - 1)) // 2
-            else:
-                # Sequential: overlap * image_count
-                estimated_pairs = int(overlap_config["overlap"]) * image_count
-            
-            if progress_callback:
-                progress_callback(0, estimated_pairs)
-            
-            result = subprocess.run(cmd, check=True, capture_output=True, text=True, env=self.env)
+        if progress_callback:
+            progress_callback(0, estimated_pairs)
+        
+        # Run with the requested settings; each failure either relaxes one
+        # setting (GPU -> CPU, exhaustive -> sequential) and retries, or raises
+        fallback = False
+        while True:
+            cmd = self._matcher_cmd(kind, extra_options, matching_base_options)
+            summary_lines.clear()
+            try:
+                _run_streaming(cmd, env=self.env, line_callback=on_line)
+            except subprocess.CalledProcessError as e:
+                # Log full error details for debugging
+                error_output = e.output or "No error output"
+                if fallback:
+                    logger.error(f"❌ Sequential fallback also failed: {error_output}")
+                else:
+                    logger.error(f"❌ Feature matching failed (exit code {e.returncode})")
+                    logger.error(f"Command: {' '.join(cmd)}")
+                    logger.error(f"Error output: {error_output}")
+                
+                # If GPU was attempted and failed, try CPU fallback
+                if matching_base_options["SiftMatching.use_gpu"] == "1" and ("GPU" in error_output or "CUDA" in error_output):
+                    logger.warning(f"⚠️  GPU feature matching failed, retrying with CPU...")
+                    self.gpu_available = False  # Disable GPU for future calls
+                    matching_base_options["SiftMatching.use_gpu"] = "0"
+                    continue
+                
+                # If exhaustive matching failed, try sequential matching as fallback
+                if exhaustive and not fallback:
+                    logger.warning(f"⚠️  Exhaustive matching failed, retrying with sequential matching (overlap=50)...")
+                    # Fallback to sequential matching with moderate overlap
+                    kind, extra_options = "sequential_matcher", {"SequentialMatching.overlap": "50"}
+                    fallback = True
+                    continue
+                
+                # Re-raise with full error details
+                raise Exception(f"Feature matching failed: {error_output}")
             
             # Parse match statistics
-            stats = self._parse_match_stats(result.stdout)
+            stats = self._parse_match_stats("\n".join(summary_lines))
             
             if progress_callback:
                 progress_callback(estimated_pairs, estimated_pairs)
             
-            logger.info(f"Feature matching complete: {stats}")
+            if fallback:
+                logger.info(f"✅ Feature matching succeeded with sequential fallback: {stats}")
+            else:
+                logger.info(f"Feature matching complete: {stats}")
             return stats
-            
-        except subprocess.CalledProcessError as e:
-            # Log full error details for debugging
-            error_output = e.stderr if e.stderr else e.stdout if e.stdout else "No error output"
-            logger.error(f"❌ Feature matching failed (exit code {e.returncode})")
-            logger.error(f"Command: {' '.join(cmd)}")
-            logger.error(f"Error output: {error_output}")
-            
-            # If GPU was attempted and failed, try CPU fallback
-            if actual_use_gpu and ("GPU" in str(error_output) or "CUDA" in str(error_output)):
-                logger.warning(f"⚠️  GPU feature matching failed, retrying with CPU...")
-                self.gpu_available = False  # Disable GPU for future calls
-                return self.match_features(matching_type=matching_type, use_gpu=False, quality=quality, progress_callback=progress_callback)
-            
-            # If exhaustive matching failed, try sequential matching as fallback
-            if overlap_config["use_exhaustive"] or matching_type == "exhaustive":
-                logger.warning(f"⚠️  Exhaustive matching failed, retrying with sequential matching (overlap=50)...")
-                try:
-                    # Fallback to sequential matching with moderate overlap
-                    fallback_cmd = [
-                        "colmap", "sequential_matcher",
-                        "--database_path", str(self.database_path),
-                        "--SequentialMatching.overlap", "50",  # Moderate overlap
-                    ] + matching_base_params
-                    
-                    if progress_callback:
-                        progress_callback(0, estimated_pairs)
-                    
-                    result = subprocess.run(fallback_cmd, check=True, capture_output=True, text=True, env=self.env)
-                    stats = self._parse_match_stats(result.stdout)
-                    
-                    if progress_callback:
-                        progress_callback(estimated_pairs, estimated_pairs)
-                    
-                    logger.info(f"✅ Feature matching succeeded with sequential fallback: {stats}")
-                    return stats
-                except subprocess.CalledProcessError as fallback_error:
-                    logger.error(f"❌ Sequential fallback also failed: {fallback_error.stderr}")
-            
-            # Re-raise with full error details
-            raise Exception(f"Feature matching failed: {error_output}")
+    
+    # Async variants for orchestrators that overlap stages across jobs (e.g.
+    # extracting frames for job N+1 while COLMAP matches job N). Each stage runs
+    # in a worker thread and spends its time waiting on its subprocess, so the
+    # event loop stays free to drive other jobs' stages concurrently.
+    
+    async def extract_frames_async(self, video_path: str, **kwargs) -> int:
+        """Async wrapper around extract_frames"""
+        return await asyncio.to_thread(self.extract_frames, video_path, **kwargs)
+    
+    async def extract_features_async(self, **kwargs) -> Dict:
+        """Async wrapper around extract_features"""
+        return await asyncio.to_thread(self.extract_features, **kwargs)
+    
+    async def match_features_async(self, **kwargs) -> Dict:
+        """Async wrapper around match_features"""
+        return await asyncio.to_thread(self.match_features, **kwargs)
     
     def dense_reconstruction(self, quality: str = "medium", progress_callback=None) -> Dict:
         """
@@ -615,6 +1411,7 @@ class COLMAPProcessor:
         Result: Much denser point cloud (10-100x more points than sparse)
         """
         logger.info(f"Starting dense reconstruction (quality={quality})")
+        profile = _QUALITY_PROFILE.get(quality, _QUALITY_PROFILE["medium"])
         
         # Step 1: Image Undistortion
         # Undistort images using sparse reconstruction camera parameters
@@ -625,7 +1422,7 @@ class COLMAPProcessor:
         
         undistort_cmd = [
             "colmap", "image_undistorter",
-            "--image_path", str(self.images_path),
+            "--image_path", self._images_path_str,
             "--input_path", str(self.sparse_path / "0"),  # Use model 0
             "--output_path", str(undistorted_path),
             "--output_type", "COLMAP"  # Keep COLMAP format
@@ -633,12 +1430,12 @@ class COLMAPProcessor:
         ]
         
         try:
-            subprocess.run(undistort_cmd, check=True, capture_output=True, text=True, env=self.env)
+            _run_streaming(_with_scheduling(undistort_cmd), env=self.env)
             logger.info("✅ Image undistortion complete")
             if progress_callback:
                 progress_callback("Undistortion complete", 33)
         except subprocess.CalledProcessError as e:
-            logger.error(f"Image undistortion failed: {e.stderr}")
+            logger.error(f"Image undistortion failed: {e.output}")
             raise
         
         # Step 2: Patch Match Stereo (Dense depth estimation)
@@ -646,87 +1443,22 @@ class COLMAPProcessor:
         if progress_callback:
             progress_callback("Patch match stereo...", 33)
         
-        # Quality-based stereo parameters - OPTIMIZED FOR RTX 4090
-        # RTX 4090 excels at parallel patch matching - maximize quality
-        # Enhanced for 5M-20M point target (ultra quality)
-        quality_params = {
-            "low": {
-                "window_radius": "5",       # Increased for better detail
-                "window_step": "1",         # Decreased for denser sampling
-                "num_samples": "15",        # 3x increase
-                "num_iterations": "5",      # More refinement
-                "geom_consistency_max_cost": "1.0",  # Stricter filtering
-                "filter_min_ncc": "0.1",    # Normal filtering
-                "cache_size": "64"          # GB - RTX 4090 has 24GB VRAM
-            },
-            "medium": {
-                "window_radius": "7",       # Larger window for better matching
-                "window_step": "1",         # Dense sampling
-                "num_samples": "30",        # 2x increase
-                "num_iterations": "7",      # More iterations = better quality
-                "geom_consistency_max_cost": "0.6",  # Better filtering
-                "filter_min_ncc": "0.2",    # Slightly stricter
-                "cache_size": "64"
-            },
-            "high": {
-                "window_radius": "11",      # Maximum detail capture
-                "window_step": "1",         # Finest sampling
-                "num_samples": "64",        # High sample count
-                "num_iterations": "12",     # Good refinement
-                "geom_consistency_max_cost": "1.0",  # LOOSE filtering for MORE points
-                "filter_min_ncc": "0.05",   # LOOSE threshold for MORE points
-                "cache_size": "64"          # Use all available VRAM
-            },
-            "ultra": {
-                "window_radius": "11",      # Maximum detail
-                "window_step": "1",         # Finest sampling
-                "num_samples": "80",       # Extreme sampling
-                "num_iterations": "10",     # Maximum refinement
-                "geom_consistency_max_cost": "1.2",  # VERY LOOSE filtering for MAX density
-                "filter_min_ncc": "0.08",   # ALMOST NO filtering - keep everything
-                "cache_size": "64",         # Use all available VRAM
-                "geom_consistency_regularizer": "0.3"  # Lower regularization
-            }
-        }
-        stereo_params = quality_params.get(quality, quality_params["medium"])
-        
         stereo_cmd = [
             "colmap", "patch_match_stereo",
             "--workspace_path", str(undistorted_path),
-            "--workspace_format", "COLMAP",
-            # CRITICAL: Prevent image downsampling - full resolution processing
-            "--DenseMapperOptions.max_image_size", "0",  # 0 = no downsampling
-            # Window parameters - control matching patch size
-            "--PatchMatchStereo.window_radius", stereo_params["window_radius"],
-            "--PatchMatchStereo.window_step", stereo_params["window_step"],
-            # Sampling parameters - more samples = better quality
-            "--PatchMatchStereo.num_samples", stereo_params["num_samples"],
-            "--PatchMatchStereo.num_iterations", stereo_params["num_iterations"],
-            # Geometric consistency filtering - removes outliers
-            "--PatchMatchStereo.geom_consistency", "true",
-            "--PatchMatchStereo.geom_consistency_max_cost", stereo_params["geom_consistency_max_cost"],
-            # Enhanced geometric consistency for ultra quality
-            *(["--PatchMatchStereo.geom_consistency_regularizer", stereo_params.get("geom_consistency_regularizer", "0.3")] 
-              if quality == "ultra" else []),
-            # NCC filtering - normalized cross correlation threshold
-            "--PatchMatchStereo.filter", "true",
-            "--PatchMatchStereo.filter_min_ncc", stereo_params["filter_min_ncc"],
-            "--PatchMatchStereo.filter_min_triangulation_angle", "1.0",
-            "--PatchMatchStereo.filter_min_num_consistent", "2",
-            # Cache size - RTX 4090 has 24GB VRAM, use it!
-            "--PatchMatchStereo.cache_size", stereo_params["cache_size"],
+            *profile.stereo_args,
             # GPU configuration
             "--PatchMatchStereo.gpu_index", "-1" if not self.gpu_available else "0",
             "--PatchMatchStereo.allow_missing_files", "false"
         ]
         
         try:
-            subprocess.run(stereo_cmd, check=True, capture_output=True, text=True, env=self.env)
+            _run_streaming(_with_scheduling(stereo_cmd), env=self.env)
             logger.info("✅ Patch match stereo complete")
             if progress_callback:
                 progress_callback("Patch match stereo complete", 66)
         except subprocess.CalledProcessError as e:
-            logger.warning(f"⚠️  Patch match stereo failed: {e.stderr}")
+            logger.warning(f"⚠️  Patch match stereo failed: {e.output}")
             logger.warning("Skipping dense reconstruction, using sparse only")
             return {"status": "skipped", "reason": "stereo_failed"}
         
@@ -735,66 +1467,26 @@ class COLMAPProcessor:
         if progress_callback:
             progress_callback("Fusing depth maps...", 66)
         
-        # Quality-based fusion parameters - fine-tuned for precision and density
-        # Enhanced for 5M-20M point target (ultra quality)
-        fusion_params = {
-            "low": {
-                "max_reproj_error": "2.0",      # Reduced for precision
-                "max_depth_error": "0.015",      # Fine-tuned
-                "max_normal_error": "12",        # Fine-tuned
-                "min_num_pixels": "3"            # Lower = more points
-            },
-            "medium": {
-                "max_reproj_error": "1.5",      # Reduced for better precision
-                "max_depth_error": "0.012",      # Fine-tuned for accuracy
-                "max_normal_error": "10",        # Fine-tuned
-                "min_num_pixels": "3"            # Lower = more points
-            },
-            "high": {
-                "max_reproj_error": "4.0",      # Relaxed for more points
-                "max_depth_error": "0.05",       # Relaxed
-                "max_normal_error": "20",         # Relaxed
-                "min_num_pixels": "2"            # Minimum pixels
-            },
-            "ultra": {
-                "max_reproj_error": "3.0",       # Extremely relaxed
-                "max_depth_error": "0.04",      # Extremely relaxed
-                "max_normal_error": "18",         # Extremely relaxed
-                "min_num_pixels": "2",           # Minimum pixels
-                "max_num_pixels": "5000",       # Maximum pixels per point
-                "max_traversal_depth": "100"     # Deep traversal for coverage
-            }
-        }
-        fusion_quality_params = fusion_params.get(quality, fusion_params["medium"])
-        
+        # Registered images in model 0 (the one undistorted above), from the
+        # images.bin header; falls back to the extracted frame count
+        num_views = (
+            _read_bin_count(os.path.join(self._sparse_path_str, "0", "images.bin"))
+            or self._image_count or self._count_images()
+        )
         fusion_cmd = [
             "colmap", "stereo_fusion",
             "--workspace_path", str(undistorted_path),
             "--workspace_format", "COLMAP",
             "--input_type", "geometric",
             "--output_path", str(self.dense_path / "fused.ply"),
-            # CRITICAL: Prevent image downsampling during fusion
-            "--DenseMapperOptions.max_image_size", "0",  # 0 = no downsampling
-            # OPTIMIZED FOR MAXIMUM DENSITY AND PRECISION - RTX 4090 can handle it
-            "--StereoFusion.min_num_pixels", fusion_quality_params["min_num_pixels"],
-            # Reduced reprojection error for more precise point fusion
-            "--StereoFusion.max_reproj_error", fusion_quality_params["max_reproj_error"],
-            # Fine-tuned depth error for better accuracy
-            "--StereoFusion.max_depth_error", fusion_quality_params["max_depth_error"],
-            # Fine-tuned normal error for better surface consistency
-            "--StereoFusion.max_normal_error", fusion_quality_params["max_normal_error"],
-            # Additional fusion parameters for better quality
-            "--StereoFusion.check_num_images", "50",   # Check consistency across many images
-            "--StereoFusion.use_cache", "true",        # Speed up with caching
-            "--StereoFusion.cache_size", "32",         # GB cache for fusion
-            # Ultra quality enhancements
-            *(["--StereoFusion.max_num_pixels", fusion_quality_params.get("max_num_pixels", "10000"),
-               "--StereoFusion.max_traversal_depth", fusion_quality_params.get("max_traversal_depth", "100")]
-              if quality == "ultra" else [])
+            *profile.fusion_args,
+            # Check consistency across many images - but never more than the
+            # other views model 0 actually registered
+            "--StereoFusion.check_num_images", str(min(50, max(5, num_views - 1))),
         ]
         
         try:
-            subprocess.run(fusion_cmd, check=True, capture_output=True, text=True, env=self.env)
+            _run_streaming(_with_scheduling(fusion_cmd), env=self.env)
             logger.info("✅ Stereo fusion complete - Dense point cloud created")
             if progress_callback:
                 progress_callback("Fusion complete", 100)
@@ -811,7 +1503,7 @@ class COLMAPProcessor:
                 return {"status": "no_output"}
                 
         except subprocess.CalledProcessError as e:
-            logger.warning(f"⚠️  Stereo fusion failed: {e.stderr}")
+            logger.warning(f"⚠️  Stereo fusion failed: {e.output}")
             return {"status": "failed", "error": str(e)}
     
     def sparse_reconstruction(self, quality: str = "medium", progress_callback=None) -> Dict:
@@ -834,44 +1526,17 @@ class COLMAPProcessor:
         """
         logger.info(f"Starting sparse reconstruction (quality={quality})")
         
-        # Quality-based mapper parameters - OPTIMIZED FOR RTX 4090
-        # Stricter parameters = better sparse model = better dense reconstruction
-        quality_params = {
-            "low": {
-                "init_min_num_inliers": "100",   # Doubled for better initialization
-                "min_num_matches": "15",         # Higher minimum for stability
-                "filter_max_reproj_error": "6.0", # Stricter filtering
-                "min_tri_angle": "1.5",         # Minimum triangulation angle
-            },
-            "medium": {
-                "init_min_num_inliers": "150",   # Higher for better quality
-                "min_num_matches": "20",         # More matches required
-                "filter_max_reproj_error": "4.0", # Tighter error threshold
-                "min_tri_angle": "1.5",
-            },
-            "high": {
-                "init_min_num_inliers": "200",   # Maximum quality initialization
-                "min_num_matches": "30",         # Many matches for robustness
-                "filter_max_reproj_error": "2.0", # Very strict for best quality
-                "min_tri_angle": "1.5",
-            },
-            "ultra": {
-                "init_min_num_inliers": "200",   # Maximum quality initialization
-                "min_num_matches": "30",         # Many matches for robustness
-                "filter_max_reproj_error": "2.0", # Very strict for best quality
-                "min_tri_angle": "1.5",         # Minimum triangulation angle for stability
-            }
-        }
-        mapper_params = quality_params.get(quality, quality_params["medium"])
+        mapper_params = _QUALITY_PROFILE.get(quality, _QUALITY_PROFILE["medium"]).mapper
         
         cmd = [
             "colmap", "mapper",
-            "--database_path", str(self.database_path),
-            "--image_path", str(self.images_path),
-            "--output_path", str(self.sparse_path),
+            "--database_path", self._database_path_str,
+            "--image_path", self._images_path_str,
+            "--output_path", self._sparse_path_str,
             
-            # Thread Configuration - RTX 4090 systems typically have high-end CPUs
-            "--Mapper.num_threads", "16",  # Increased for faster processing
+            # Thread Configuration - one thread per core (a fixed 16 oversubscribes
+            # small VMs and idles big workstations), capped where mapper scaling flattens
+            "--Mapper.num_threads", str(min(os.cpu_count() or 8, 32)),
             
             # Initialization
             "--Mapper.init_min_num_inliers", mapper_params["init_min_num_inliers"],
@@ -907,13 +1572,40 @@ class COLMAPProcessor:
             "--Mapper.extract_colors", "1",  # RGB colors for points
         ]
         
+        # Stream the mapper log: registration progress is forwarded and the
+        # reconstruction statistics are parsed as lines arrive (last value wins)
+        image_count = self._image_count or self._count_images()
+        report_progress = None
+        if progress_callback and image_count:
+            report_progress = _throttled_progress(
+                lambda registered, total: progress_callback(
+                    f"Registered {registered}/{total} images", registered * 100 // total
+                )
+            )
+        stats = {"status": "unknown"}
+        
+        def on_line(line: str):
+            if "Database" in line:
+                stats["status"] = "success"
+            match = _RE_MAPPER_PROGRESS.search(line)
+            if match:
+                if report_progress:
+                    report_progress(int(match.group(1)), image_count)
+                return
+            match = _RE_REGISTERED_IMAGES.match(line)
+            if match:
+                stats["registered_images"] = int(match.group(1))
+                return
+            match = _RE_RECONSTRUCTED_POINTS.match(line)
+            if match:
+                stats["reconstructed_points"] = int(match.group(1))
+        
         try:
-            result = subprocess.run(cmd, check=True, capture_output=True, text=True, env=self.env)
-            
-            # Parse reconstruction statistics
-            stats = self._parse_reconstruction_stats(result.stdout)
+            _run_streaming(_with_scheduling(cmd), env=self.env, line_callback=on_line)
             
-            # Find best model (most 3D points)
+            # Find best model (most 3D points) - the mapper may have rewritten
+            # existing model directories, which doesn't touch sparse_path's mtime
+            self._best_model_cache = None
             best_model, model_stats = self._find_best_model()
             logger.info(f"Sparse reconstruction complete: {stats}")
             
@@ -925,35 +1617,14 @@ class COLMAPProcessor:
             }
             
         except subprocess.CalledProcessError as e:
-            logger.error(f"Sparse reconstruction failed: {e.stderr}")
+            logger.error(f"Sparse reconstruction failed: {e.output}")
             raise
     
-    def export_model(self, output_format: str = "PLY", model_dir: Optional[Path] = None) -> str:
+    def _export_cmd(self, output_format: str, model_dir: Path) -> Tuple[list, Path]:
         """
-        Export reconstruction to various formats
-        
-        Reference: https://colmap.github.io/tutorial.html#importing-and-exporting
-        
-        Supported formats (per COLMAP tutorial):
-        - PLY: Point cloud for visualization
-        - TXT: Text format (cameras.txt, images.txt, points3D.txt)
-        - BIN: Binary format (native)
-        - NVM: VisualSFM format
-        - Bundler: Bundler format
-        - VRML: VRML format
-        
-        Exports the best sparse model to specified format.
-        Following COLMAP convention, output goes to workspace root (job_path).
+        Build the model_converter command for one export format
+        Returns (cmd, output path) without running anything
         """
-        # Find best sparse model if not specified
-        if model_dir is None:
-            best_model, _ = self._find_best_model()
-            if not best_model:
-                raise ValueError("No reconstruction found to export")
-            model_dir = best_model
-        
-        logger.info(f"Exporting model {model_dir} to {output_format} format")
-        
         # Handle different output formats
         if output_format == "PLY":
             # Point cloud export
@@ -1002,14 +1673,64 @@ class COLMAPProcessor:
         else:
             raise ValueError(f"Unsupported export format: {output_format}")
         
-        try:
-            result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+        return cmd, output_file
+    
+    def export_models(self, formats, model_dir: Optional[Path] = None) -> Dict[str, str]:
+        """
+        Export the reconstruction to several formats at once
+        
+        Each format is a separate model_converter process writing to its own
+        file or directory, so they run concurrently on the same input model.
+        Returns {format: output path}.
+        """
+        # Find best sparse model if not specified
+        if model_dir is None:
+            best_model, _ = self._find_best_model()
+            if not best_model:
+                raise ValueError("No reconstruction found to export")
+            model_dir = best_model
+        
+        formats = list(dict.fromkeys(formats))
+        logger.info(f"Exporting model {model_dir} to {', '.join(formats)} format")
+        
+        # Build every command first so an unsupported format fails before
+        # any converter is launched
+        exports = {output_format: self._export_cmd(output_format, model_dir) for output_format in formats}
+        
+        def run_export(output_format: str) -> str:
+            cmd, output_file = exports[output_format]
+            try:
+                _run_streaming(_with_scheduling(cmd), env=self.env)
+            except subprocess.CalledProcessError as e:
+                logger.error(f"Export failed: {e.output}")
+                raise
             logger.info(f"Exported model to {output_file} ({output_format} format)")
             return str(output_file)
-            
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Export failed: {e.stderr}")
-            raise
+        
+        if len(formats) == 1:
+            return {formats[0]: run_export(formats[0])}
+        
+        with ThreadPoolExecutor(max_workers=len(formats)) as pool:
+            return dict(zip(formats, pool.map(run_export, formats)))
+    
+    def export_model(self, output_format: str = "PLY", model_dir: Optional[Path] = None) -> str:
+        """
+        Export reconstruction to various formats
+        
+        Reference: https://colmap.github.io/tutorial.html#importing-and-exporting
+        
+        Supported formats (per COLMAP tutorial):
+        - PLY: Point cloud for visualization
+        - TXT: Text format (cameras.txt, images.txt, points3D.txt)
+        - BIN: Binary format (native)
+        - NVM: VisualSFM format
+        - Bundler: Bundler format
+        - VRML: VRML format
+        
+        Exports the best sparse model to specified format.
+        Following COLMAP convention, output goes to workspace root (job_path).
+        """
+        return self.export_models([output_format], model_dir)[output_format]
     
     def export_point_cloud(self, output_format: str = "PLY") -> str:
         """
@@ -1032,12 +1753,13 @@ class COLMAPProcessor:
         """
         logger.info(f"Importing model from {import_path} ({input_format} format)")
         
-        # Create import directory in sparse/
-        sparse_dirs = sorted(self.sparse_path.glob("[0-9]*"))
-        if sparse_dirs:
-            next_model_id = max([int(d.name) for d in sparse_dirs]) + 1
-        else:
-            next_model_id = 0
+        # Create import directory in sparse/ after the highest existing model id
+        # (one streaming pass; scandir avoids a stat() and Path object per entry)
+        with os.scandir(self.sparse_path) as it:
+            next_model_id = max(
+                (int(e.name) for e in it if e.name.isdigit() and e.is_dir()),
+                default=-1
+            ) + 1
         
         import_dir = self.sparse_path / str(next_model_id)
         import_dir.mkdir(parents=True, exist_ok=True)
@@ -1055,12 +1777,13 @@ class COLMAPProcessor:
         ]
         
         try:
-            result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+            _run_streaming(_with_scheduling(cmd), env=self.env)
+            self._best_model_cache = None
             logger.info(f"Imported model to {import_dir}")
             return import_dir
             
         except subprocess.CalledProcessError as e:
-            logger.error(f"Import failed: {e.stderr}")
+            logger.error(f"Import failed: {e.output}")
             raise
     
     def _find_best_model(self) -> Tuple[Optional[Path], Dict]:
@@ -1072,34 +1795,47 @@ class COLMAPProcessor:
         with the most 3D points as the best reconstruction.
         
         Reference: https://colmap.github.io/tutorial.html#sparse-reconstruction
+        
+        The result is cached until sparse_path's mtime changes (a model
+        directory added or removed) or this processor writes a model.
         """
-        sparse_dirs = sorted(self.sparse_path.glob("[0-9]*"))
+        mtime_ns = os.stat(self.sparse_path).st_mtime_ns
+        if self._best_model_cache and self._best_model_cache[0] == mtime_ns:
+            return self._best_model_cache[1], dict(self._best_model_cache[2])
+        
+        # scandir yields cached d_type info - no extra stat() per entry
+        with os.scandir(self.sparse_path) as it:
+            sparse_dirs = sorted(
+                (e for e in it if e.name.isdigit() and e.is_dir()),
+                key=lambda e: int(e.name)
+            )
         
         if not sparse_dirs:
             return None, {}
         
-        best_model = sparse_dirs[0]  # Default to first
-        best_points = 0
-        
-        for sparse_dir in sparse_dirs:
-            points3d_file = sparse_dir / "points3D.bin"
-            if points3d_file.exists():
-                # Count points (approximate by file size)
-                # Each point in binary format: id (uint64) + xyz (3x float32) + rgb (uint8x3) + error (float32) + 2x track (int64)
-                # Total: 8 + 12 + 3 + 4 + 16 = ~43 bytes + alignment ≈ 48 bytes
-                point_count = points3d_file.stat().st_size // 48
-                if point_count > best_points:
+        best_entry = sparse_dirs[0]  # Default to first
+        
+        if len(sparse_dirs) == 1:
+            # Common case: nothing to compare, only read the count callers report
+            best_points = _read_bin_count(os.path.join(best_entry.path, "points3D.bin")) or 0
+        else:
+            best_points = 0
+            for entry in sparse_dirs:
+                point_count = _read_bin_count(os.path.join(entry.path, "points3D.bin"))
+                if point_count is not None and point_count > best_points:
                     best_points = point_count
-                    best_model = sparse_dir
+                    best_entry = entry
         
+        best_model = Path(best_entry.path)
         stats = {
             "num_models": len(sparse_dirs),
             "points_3d": best_points,
-            "model_id": best_model.name
+            "model_id": best_entry.name
         }
         
-        logger.info(f"Found {len(sparse_dirs)} models, best is {best_model.name} with {best_points} points")
-        return best_model, stats
+        logger.info(f"Found {len(sparse_dirs)} models, best is {best_entry.name} with {best_points} points")
+        self._best_model_cache = (mtime_ns, best_model, stats)
+        return best_model, dict(stats)
     
     def _parse_feature_stats(self, output: str) -> Dict:
         """
@@ -1110,25 +1846,10 @@ class COLMAPProcessor:
             "status": "success" if "Database" in output else "unknown"
         }
         
-        # Try to extract statistics from output
-        lines = output.split('\n')
-        for i, line in enumerate(lines):
-            # Look for database stats
-            if "Database:" in line and i + 1 < len(lines):
-                # Next line often has image count
-                try:
-                    num_images = len(list(self.images_path.glob("*.jpg")))
-                    stats["num_images"] = num_images
-                except:
-                    pass
-                break
-        
-        # Count features in database
+        # Count features in database (authoritative image count - no directory scan)
         try:
             if self.database_path.exists():
-                import sqlite3
-                conn = sqlite3.connect(self.database_path)
-                cursor = conn.cursor()
+                cursor = self._get_ro_conn().cursor()
                 
                 # Count keypoints
                 cursor.execute("SELECT COUNT(*) FROM keypoints")
@@ -1141,7 +1862,6 @@ class COLMAPProcessor:
                 if stats["num_images"] > 0:
                     stats["avg_features_per_image"] = stats["total_keypoints"] // stats["num_images"]
                 
-                conn.close()
                 logger.info(f"Feature stats: {stats['num_images']} images, {stats['total_keypoints']} keypoints")
         except Exception as e:
             logger.warning(f"Could not parse feature stats from database: {e}")
@@ -1157,71 +1877,26 @@ class COLMAPProcessor:
             "status": "success" if "Database" in output else "unknown"
         }
         
-        # Try to extract statistics from output
-        lines = output.split('\n')
-        for line in lines:
-            # Look for match count
-            if "Matched" in line and "pairs" in line:
-                try:
-                    # Extract number from "Matched X image pairs"
-                    import re
-                    match = re.search(r'(\d+)', line)
-                    if match:
-                        stats["matched_pairs"] = int(match.group(1))
-                except:
-                    pass
+        # Extract number from "Matched X image pairs"
+        matched_pairs = _last_int(_RE_MATCHED_PAIRS, output)
+        if matched_pairs is not None:
+            stats["matched_pairs"] = matched_pairs
         
         # Count matches in database
         try:
             if self.database_path.exists():
-                import sqlite3
-                conn = sqlite3.connect(self.database_path)
-                cursor = conn.cursor()
+                cursor = self._get_ro_conn().cursor()
                 
                 # Count two-view geometries (verified matches)
                 cursor.execute("SELECT COUNT(*) FROM two_view_geometries")
                 stats["verified_pairs"] = cursor.fetchone()[0]
                 
-                conn.close()
                 logger.info(f"Match stats: {stats.get('verified_pairs', 'unknown')} verified pairs")
         except Exception as e:
             logger.warning(f"Could not parse match stats from database: {e}")
         
         return stats
     
-    def _parse_reconstruction_stats(self, output: str) -> Dict:
-        """
-        Parse sparse reconstruction statistics from COLMAP output
-        """
-        stats = {
-            "status": "success" if "Database" in output else "unknown"
-        }
-        
-        # Try to extract statistics from output
-        lines = output.split('\n')
-        for line in lines:
-            # Look for registered images
-            if "Registered" in line and "images" in line:
-                try:
-                    import re
-                    match = re.search(r'(\d+)', line)
-                    if match:
-                        stats["registered_images"] = int(match.group(1))
-                except:
-                    pass
-            
-            # Look for reconstructed points
-            if "Reconstructed" in line and "points" in line:
-                try:
-                    import re
-                    match = re.search(r'(\d+)', line)
-                    if match:
-                        stats["reconstructed_points"] = int(match.group(1))
-                except:
-                    pass
-        
-        return stats
-    
     def inspect_database(self) -> Dict:
         """
         Inspect COLMAP database contents
@@ -1243,52 +1918,51 @@ class COLMAPProcessor:
             logger.warning(f"Database not found at {self.database_path}")
             return {"status": "not_found", "message": "Database does not exist yet"}
         
-        import sqlite3
+        # Polling between writes: nothing changed, reuse the last result
+        cache_key = self._database_stat_key()
+        cached = _INSPECT_CACHE.get(self._database_path_str)
+        if cached and cached[0] == cache_key:
+            return dict(cached[1])
         
         stats = {
             "status": "success",
-            "database_path": str(self.database_path),
+            "database_path": self._database_path_str,
         }
         
         try:
-            conn = sqlite3.connect(self.database_path)
-            
-            # Optimize SQLite for read performance
-            # Enable Write-Ahead Logging (WAL) for better concurrency
-            conn.execute("PRAGMA journal_mode=WAL")
-            # Increase page cache size (16MB)
-            conn.execute("PRAGMA cache_size=-16384")
-            # Use memory-mapped I/O for better performance
-            conn.execute("PRAGMA mmap_size=268435456")  # 256MB
-            
-            cursor = conn.cursor()
-            
-            # Get all camera information in one query
-            cursor.execute("SELECT * FROM cameras LIMIT 100")
-            cameras = cursor.fetchall()
-            stats["num_cameras"] = cursor.execute("SELECT COUNT(*) FROM cameras").fetchone()[0]
+            # Cached read-only connection already has page cache and mmap PRAGMAs applied
+            cursor = self._get_ro_conn().cursor()
+            
+            # Get camera information and the total camera count in one query,
+            # converting rows in chunks rather than materializing them all
+            cursor.execute(self._SQL_CAMERAS)
+            stats["num_cameras"] = 0
+            cameras = []
+            while True:
+                rows = cursor.fetchmany(32)
+                if not rows:
+                    break
+                stats["num_cameras"] = rows[0][0]
+                cameras.extend(
+                    {
+                        "camera_id": camera[1],
+                        "model": camera[2],
+                        "width": camera[3],
+                        "height": camera[4],
+                        "params": camera[5]
+                    }
+                    for camera in rows
+                )
             
             if cameras:
-                stats["cameras"] = []
-                for camera in cameras:
-                    stats["cameras"].append({
-                        "camera_id": camera[0],
-                        "model": camera[1],
-                        "width": camera[2],
-                        "height": camera[3],
-                        "params": camera[4]
-                    })
-            
-            # Get all counts in combined query for efficiency
-            cursor.execute("""
-                SELECT 
-                    (SELECT COUNT(*) FROM images) as num_images,
-                    (SELECT COUNT(*) FROM keypoints) as num_keypoints,
-                    (SELECT AVG(rows) FROM keypoints) as avg_keypoints,
-                    (SELECT COUNT(*) FROM matches) as num_matches,
-                    (SELECT AVG(rows) FROM matches) as avg_matches,
-                    (SELECT COUNT(*) FROM two_view_geometries) as num_tvg
-            """)
+                stats["cameras"] = cameras
+            
+            # Get all counts in one round trip
+            if not COLMAPProcessor._counts_plan_logged and logger.isEnabledFor(logging.DEBUG):
+                COLMAPProcessor._counts_plan_logged = True
+                plan = cursor.execute("EXPLAIN QUERY PLAN " + self._SQL_COUNTS).fetchall()
+                logger.debug("inspect_database counts plan:\n" + "\n".join(row[-1] for row in plan))
+            cursor.execute(self._SQL_COUNTS)
             counts = cursor.fetchone()
             
             stats["num_images"] = counts[0] or 0
@@ -1297,38 +1971,33 @@ class COLMAPProcessor:
             stats["num_matches"] = counts[3] or 0
             stats["avg_matches_per_pair"] = round(counts[4], 2) if counts[4] else 0
             stats["num_two_view_geometries"] = counts[5] or 0
+            avg_inliers = counts[6]
+            inlier_ratio = counts[7]
             
             # Get top images (limit for performance)
-            cursor.execute("SELECT name, camera_id FROM images LIMIT 50")
+            cursor.execute(self._SQL_IMAGES)
             images = cursor.fetchall()
             if images:
                 stats["images"] = [{"name": img[0], "camera_id": img[1]} for img in images]
             
-            # Get two-view geometry statistics
-            cursor.execute("SELECT AVG(CAST(rows AS FLOAT)) FROM two_view_geometries WHERE rows > 0")
-            avg_inliers = cursor.fetchone()[0]
+            # Two-view geometry statistics (computed in the counts scan above)
             if avg_inliers:
                 stats["avg_inliers_per_pair"] = round(avg_inliers, 2)
             
-            # Calculate verification rate and inlier ratio in one query
+            # Verification rate and inlier ratio (also from the counts scan)
             if stats["num_matches"] > 0:
                 stats["verification_rate"] = round((stats["num_two_view_geometries"] / stats["num_matches"]) * 100, 2)
                 
-                # Optimized inlier ratio query with proper indexing
-                cursor.execute("""
-                    SELECT AVG(CAST(tvg.rows AS FLOAT) / CAST(m.rows AS FLOAT))
-                    FROM two_view_geometries tvg 
-                    JOIN matches m ON tvg.pair_id = m.pair_id 
-                    WHERE m.rows > 0 AND tvg.rows > 0
-                """)
-                inlier_ratio = cursor.fetchone()[0]
                 if inlier_ratio:
                     stats["avg_inlier_ratio"] = round(inlier_ratio * 100, 2)
             
-            conn.close()
-            
             logger.info(f"Database inspection complete: {stats['num_cameras']} cameras, {stats['num_images']} images, {stats['num_keypoints']} keypoints")
             
+            _INSPECT_CACHE.pop(self._database_path_str, None)
+            if len(_INSPECT_CACHE) >= _INSPECT_CACHE_MAX:
+                _INSPECT_CACHE.pop(next(iter(_INSPECT_CACHE)), None)
+            _INSPECT_CACHE[self._database_path_str] = (cache_key, dict(stats))
+            
         except Exception as e:
             logger.error(f"Database inspection failed: {e}")
             stats["status"] = "error"
@@ -1336,7 +2005,66 @@ class COLMAPProcessor:
         
         return stats
     
-    def clean_database(self) -> Dict:
+    def _database_stat_key(self) -> tuple:
+        """
+        (mtime_ns, size) of database.db and its -wal file - in WAL mode
+        commits land in the -wal file and leave the main file untouched
+        until a checkpoint
+        """
+        key = []
+        for path in (self._database_path_str, self._database_path_str + "-wal"):
+            try:
+                st = os.stat(path)
+                key.append((st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                key.append(None)
+        return tuple(key)
+    
+    # clean_database: set-oriented deletes run in one transaction, in order.
+    # pair_id encodes its two image ids as id1 * 2147483647 + id2 (COLMAP's
+    # kMaxNumImages), so orphaned pairs are found without a join table.
+    # Images are only dropped for lacking features once features exist at all
+    _SQL_CLEAN = (
+        ("images", """
+            DELETE FROM images
+            WHERE image_id NOT IN (SELECT image_id FROM keypoints WHERE rows > 0)
+              AND EXISTS (SELECT 1 FROM keypoints)
+        """),
+        ("keypoints", "DELETE FROM keypoints WHERE image_id NOT IN (SELECT image_id FROM images)"),
+        ("descriptors", "DELETE FROM descriptors WHERE image_id NOT IN (SELECT image_id FROM images)"),
+        ("matches", """
+            DELETE FROM matches
+            WHERE pair_id / 2147483647 NOT IN (SELECT image_id FROM images)
+               OR pair_id % 2147483647 NOT IN (SELECT image_id FROM images)
+        """),
+        ("two_view_geometries", """
+            DELETE FROM two_view_geometries
+            WHERE pair_id / 2147483647 NOT IN (SELECT image_id FROM images)
+               OR pair_id % 2147483647 NOT IN (SELECT image_id FROM images)
+        """),
+    )
+    
+    def _clean_database_native(self) -> Dict[str, int]:
+        """
+        Remove images without features and everything orphaned by them
+        in-process: one write transaction, then VACUUM to return the space
+        
+        Returns {table: rows removed}
+        """
+        conn = self._get_conn()
+        removed = {}
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for table, sql in self._SQL_CLEAN:
+                removed[table] = conn.execute(sql).rowcount
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("VACUUM")
+        return removed
+    
+    def clean_database(self, use_native: bool = True) -> Dict:
         """
         Clean COLMAP database by removing unused data
         Reference: https://colmap.github.io/tutorial.html#database-management
@@ -1350,47 +2078,75 @@ class COLMAPProcessor:
         - Smaller file size
         - Faster processing
         - Cleaner data structure
+        
+        Runs in-process by default; use_native=False shells out to
+        colmap database_cleaner instead.
         """
         if not self.database_path.exists():
             logger.warning(f"Database not found at {self.database_path}")
             return {"status": "not_found", "message": "Database does not exist yet"}
         
         try:
-            import sqlite3
-            import tempfile
-            
             logger.info("Cleaning database...")
             
-            # Create backup
+            # Create backup with SQLite's online backup API - a consistent
+            # page-level snapshot that is safe alongside WAL and other readers
+            # (1024 pages = 4MB per step). Reading the source only needs the
+            # read-only connection
             backup_path = self.database_path.with_suffix('.db.backup')
-            shutil.copy2(self.database_path, backup_path)
+            backup_conn = sqlite3.connect(str(backup_path))
+            try:
+                self._get_ro_conn().backup(backup_conn, pages=1024)
+            finally:
+                backup_conn.close()
             logger.info(f"Created backup: {backup_path}")
+            _INSPECT_CACHE.pop(self._database_path_str, None)
+            
+            if use_native:
+                removed = self._clean_database_native()
+                logger.info(f"Database cleaned successfully: {removed}")
+                # Row counts changed - refresh planner stats
+                self._optimize()
+                return {
+                    "status": "success",
+                    "message": "Database cleaned successfully",
+                    "removed": removed,
+                    "backup_path": str(backup_path)
+                }
+            
+            # Release our handle - COLMAP rewrites the file below
+            self.close()
             
             # Use COLMAP database_cleaner
             # Reference: https://colmap.github.io/cli.html#database-cleaner
             cmd = [
                 "colmap", "database_cleaner",
-                "--database_path", str(self.database_path),
+                "--database_path", self._database_path_str,
             ]
             
-            result = subprocess.run(
+            result = _run_streaming(
                 cmd,
-                capture_output=True,
-                text=True,
                 check=False  # Don't fail if database is already clean
             )
             
             if result.returncode == 0:
                 logger.info("Database cleaned successfully")
+                # Row counts changed underneath us - refresh planner stats
+                self._get_conn()
+                self._optimize()
                 return {
                     "status": "success",
                     "message": "Database cleaned successfully",
                     "backup_path": str(backup_path)
                 }
             else:
-                logger.warning(f"Database cleaner returned {result.returncode}: {result.stderr}")
-                # Restore backup
-                shutil.copy2(backup_path, self.database_path)
+                logger.warning(f"Database cleaner returned {result.returncode}: {result.stdout}")
+                # Restore backup (page copy into the live database, WAL-safe)
+                backup_conn = sqlite3.connect(str(backup_path))
+                try:
+                    backup_conn.backup(self._get_conn(), pages=1024)
+                finally:
+                    backup_conn.close()
                 return {
                     "status": "warning",
                     "message": "Database may not need cleaning",
@@ -1409,45 +2165,39 @@ class COLMAPProcessor:
         
         Returns camera model (PINHOLE, SIMPLE_PINHOLE, etc.) and parameters
         """
-        if not self.database_path.exists():
-            return None
+        return self.get_cameras_for_images([image_name]).get(image_name)
+    
+    def get_cameras_for_images(self, image_names: list) -> Dict[str, Dict]:
+        """
+        Get camera parameters for many images in one query
+        (the names are bound as a single JSON array, so there is no
+        bound-parameter limit and the statement text never changes)
+        
+        Returns {image_name: camera dict}; names not in the database are omitted
+        """
+        if not self.database_path.exists() or not image_names:
+            return {}
         
+        cameras = {}
         try:
-            import sqlite3
-            
-            conn = sqlite3.connect(self.database_path)
-            cursor = conn.cursor()
-            
-            # Get image's camera_id
-            cursor.execute("SELECT camera_id FROM images WHERE name = ?", (image_name,))
-            result = cursor.fetchone()
-            
-            if not result:
-                conn.close()
-                return None
-            
-            camera_id = result[0]
-            
-            # Get camera details
-            cursor.execute("SELECT * FROM cameras WHERE camera_id = ?", (camera_id,))
-            camera = cursor.fetchone()
-            
-            conn.close()
-            
-            if camera:
-                return {
-                    "camera_id": camera[0],
-                    "model": camera[1],
-                    "width": camera[2],
-                    "height": camera[3],
-                    "params": camera[4]
+            rows = self._get_ro_conn().execute(
+                "SELECT i.name, c.camera_id, c.model, c.width, c.height, c.params "
+                "FROM images i JOIN cameras c ON i.camera_id = c.camera_id "
+                "WHERE i.name IN (SELECT value FROM json_each(?))",
+                (json.dumps(list(image_names)),)
+            )
+            for row in rows:
+                cameras[row[0]] = {
+                    "camera_id": row[1],
+                    "model": row[2],
+                    "width": row[3],
+                    "height": row[4],
+                    "params": row[5]
                 }
-            
-            return None
-            
         except Exception as e:
-            logger.error(f"Failed to get camera for image {image_name}: {e}")
-            return None
+            logger.error(f"Failed to get cameras for {len(image_names)} images: {e}")
+        
+        return cameras
     
     def set_camera_for_images(self, image_names: list, camera_id: int) -> Dict:
         """
@@ -1463,19 +2213,25 @@ class COLMAPProcessor:
             return {"status": "not_found", "message": "Database does not exist yet"}
         
         try:
-            import sqlite3
-            
-            conn = sqlite3.connect(self.database_path)
+            conn = self._get_conn()
             cursor = conn.cursor()
             
-            updated_count = 0
-            for image_name in image_names:
-                cursor.execute("UPDATE images SET camera_id = ? WHERE name = ?", (camera_id, image_name))
-                if cursor.rowcount > 0:
-                    updated_count += 1
-            
-            conn.commit()
-            conn.close()
+            # One set-oriented UPDATE for the whole batch: the names go in as a
+            # single JSON array parameter and each is probed on the UNIQUE name
+            # index (single write transaction - the connection is autocommit)
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                cursor.execute(
+                    "UPDATE images SET camera_id = ? WHERE name IN (SELECT value FROM json_each(?))",
+                    (camera_id, json.dumps(list(image_names)))
+                )
+                updated_count = cursor.rowcount
+                conn.execute("COMMIT")
+                _INSPECT_CACHE.pop(self._database_path_str, None)
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            self._optimize()
             
             logger.info(f"Updated camera for {updated_count} images")
             
@@ -1494,13 +2250,19 @@ def process_video_to_pointcloud(
     job_id: str,
     video_path: str,
     quality: str = "medium",
-    max_frames: int = 50
+    max_frames: int = 50,
+    processor: Optional[COLMAPProcessor] = None
 ) -> Dict:
     """
     Complete pipeline: Video -> 3D Point Cloud
+    
+    Pass a pre-built processor to reuse its workspace and database connection
+    (e.g. when retrying a job); otherwise one is created under
+    $COLMAP_WORKSPACE/<job_id> (default /workspace).
     """
-    job_path = f"/workspace/{job_id}"
-    processor = COLMAPProcessor(job_path)
+    if processor is None:
+        job_path = Path(os.getenv("COLMAP_WORKSPACE", "/workspace")) / job_id
+        processor = COLMAPProcessor(str(job_path))
     
     # Step 1: Extract frames
     frame_count = processor.extract_frames(video_path, max_frames=max_frames)
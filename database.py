@@ -5,15 +5,110 @@ Stores users, projects, scans, and technical details
 
 import sqlite3
 import json
+import functools
 import logging
 import os
+import threading
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator
 import uuid
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
 logger = logging.getLogger(__name__)
 
+# JSON columns (processing_stages, results) go through orjson when available
+if HAS_ORJSON:
+    def _json_dumps(obj) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+    _json_loads = orjson.loads
+else:
+    _json_dumps = json.dumps
+    _json_loads = json.loads
+
+# Connection-local PRAGMAs: applied on every connect since SQLite drops them
+# with the connection. journal_mode is persistent and set in init_database.
+_CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA mmap_size=268435456",
+)
+
+# Hot-path statements kept as module constants so every call hands the
+# connection's statement cache the same SQL text
+_SQL_GET_SCAN = 'SELECT * FROM scans WHERE id = ?'
+
+_SQL_GET_SCAN_DETAILS = '''
+    SELECT s.*,
+           p.name as project_name,
+           p.location as project_location,
+           std.point_count,
+           std.camera_count,
+           std.feature_count,
+           std.processing_time_seconds,
+           std.resolution,
+           std.file_size_bytes,
+           std.reconstruction_error,
+           std.coverage_percentage,
+           std.processing_stages,
+           std.results
+    FROM scans s
+    LEFT JOIN projects p ON s.project_id = p.id
+    LEFT JOIN scan_technical_details std ON s.id = std.scan_id
+    WHERE s.id = ?
+'''
+
+_SQL_UPDATE_SCAN_STATUS = 'UPDATE scans SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?'
+
+_SQL_UPDATE_SCAN_STATUS_THUMBNAIL = 'UPDATE scans SET status = ?, thumbnail_path = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?'
+
+_SQL_UPSERT_JOB = '''
+    INSERT INTO processing_jobs 
+    (job_id, scan_id, status, progress, current_stage, message)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(job_id) DO UPDATE SET
+        status = excluded.status,
+        progress = excluded.progress,
+        current_stage = excluded.current_stage,
+        message = excluded.message
+'''
+
+_SQL_SAVE_TECHNICAL_DETAILS = '''
+    INSERT OR REPLACE INTO scan_technical_details 
+    (scan_id, point_count, camera_count, feature_count, processing_time_seconds,
+     resolution, file_size_bytes, reconstruction_error, coverage_percentage,
+     processing_stages, results)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# Measured reconstruction_metrics columns; the rest are generated from these
+_METRICS_BASE_COLUMNS = (
+    'scan_id, quality_mode, sparse_points, dense_points, registered_images, total_images, '
+    'avg_reproj_error, avg_track_length, coverage_percentage, processing_time_seconds, created_at'
+)
+
+_SQL_SAVE_RECONSTRUCTION_METRICS = '''
+    INSERT OR REPLACE INTO reconstruction_metrics 
+    (scan_id, quality_mode, sparse_points, dense_points, registered_images, total_images,
+     avg_reproj_error, avg_track_length, coverage_percentage, processing_time_seconds)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    RETURNING density_multiplier
+'''
+
+@functools.lru_cache(maxsize=64)
+def _column_names(description) -> tuple:
+    return tuple(column[0] for column in description)
+
+def _dict_factory(cursor, row) -> Dict:
+    """Build result rows as plain dicts so methods can return them without copying"""
+    return dict(zip(_column_names(cursor.description), row))
+
 class Database:
     """Simple SQLite database for storing COLMAP app data"""
     
@@ -21,21 +116,42 @@ class Database:
         if db_path is None:
             db_path = os.getenv("DATABASE_PATH", "/workspace/database.db")
         self.db_path = db_path
+        # One connection per thread, reused across calls so the page cache
+        # and compiled statements survive between requests
+        self._local = threading.local()
         # Ensure directory exists
         db_dir = Path(db_path).parent
         db_dir.mkdir(parents=True, exist_ok=True)
         self.init_database()
     
     def get_connection(self):
-        """Get database connection with row factory"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row  # Enable dict-like access to rows
+        """Get this thread's database connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, cached_statements=256)
+            conn.row_factory = _dict_factory  # Rows come back as dicts
+            for pragma in _CONNECTION_PRAGMAS:
+                conn.execute(pragma)
+            self._local.conn = conn
         return conn
     
+    def close(self):
+        """Close this thread's database connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            self._local.conn = None
+            conn.close()
+    
     def init_database(self):
         """Initialize database tables"""
         conn = self.get_connection()
         try:
+            # WAL lets readers proceed while a job update commits, and with
+            # synchronous=NORMAL each commit costs one fsync instead of two.
+            # The mode is stored in the file, so setting it here is enough.
+            if not self.db_path.endswith(':memory:'):
+                conn.execute("PRAGMA journal_mode=WAL")
+            
             # Users table
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS users (
@@ -57,12 +173,28 @@ class Database:
                     space_type TEXT,
                     project_type TEXT,
                     status TEXT DEFAULT 'active',
+                    scan_count INTEGER DEFAULT 0,  -- Maintained by the scans triggers below
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     FOREIGN KEY (user_id) REFERENCES users (id)
                 )
             ''')
             
+            # main.py's init_database may have created projects first without
+            # these columns. ADD COLUMN only accepts constant defaults, so
+            # updated_at is backfilled from created_at and set on insert
+            project_columns = {row['name'] for row in conn.execute('PRAGMA table_info(projects)')}
+            if 'status' not in project_columns:
+                conn.execute("ALTER TABLE projects ADD COLUMN status TEXT DEFAULT 'active'")
+                logger.info("✅ Added projects.status column")
+            if 'updated_at' not in project_columns:
+                conn.execute("ALTER TABLE projects ADD COLUMN updated_at TIMESTAMP")
+                conn.execute("UPDATE projects SET updated_at = created_at")
+                logger.info("✅ Added projects.updated_at column")
+            
+            # get_user_projects filters projects by owner
+            self._create_index(conn, 'idx_projects_user_id', 'projects (user_id, updated_at DESC)')
+            
             # Scans table
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS scans (
@@ -88,6 +220,8 @@ class Database:
                     FOREIGN KEY (project_id) REFERENCES projects (id)
                 )
             ''')
+            # Project scan lists look scans up by project
+            self._create_index(conn, 'idx_scans_project_id', 'scans (project_id, created_at DESC)')
             
             # Add new columns to existing scans table if they don't exist
             try:
@@ -125,6 +259,31 @@ class Database:
             except:
                 pass
             
+            try:
+                conn.execute("ALTER TABLE projects ADD COLUMN scan_count INTEGER DEFAULT 0")
+                # Existing databases: backfill once, the triggers keep it current afterwards
+                conn.execute('''
+                    UPDATE projects
+                    SET scan_count = (SELECT COUNT(*) FROM scans WHERE scans.project_id = projects.id)
+                ''')
+                logger.info("✅ Added scan_count column")
+            except:
+                pass
+            
+            # Keep projects.scan_count in step with scans so listings need no GROUP BY
+            conn.execute('''
+                CREATE TRIGGER IF NOT EXISTS trg_scan_inc AFTER INSERT ON scans
+                BEGIN
+                    UPDATE projects SET scan_count = scan_count + 1 WHERE id = NEW.project_id;
+                END
+            ''')
+            conn.execute('''
+                CREATE TRIGGER IF NOT EXISTS trg_scan_dec AFTER DELETE ON scans
+                BEGIN
+                    UPDATE projects SET scan_count = scan_count - 1 WHERE id = OLD.project_id;
+                END
+            ''')
+            
             # Technical details table (stores COLMAP processing results)
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS scan_technical_details (
@@ -158,37 +317,89 @@ class Database:
                     FOREIGN KEY (scan_id) REFERENCES scans (id)
                 )
             ''')
+            self._create_index(conn, 'idx_jobs_scan_id', 'processing_jobs (scan_id)')
+            
+            # Older databases store the derived metrics as plain columns (or an
+            # earlier grade expression); SQLite cannot change those in place, so
+            # park the measured values and recreate the table below
+            metrics_table = conn.execute(
+                "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'reconstruction_metrics'"
+            ).fetchone()
+            migrate_metrics = bool(metrics_table) and 'COALESCE(avg_reproj_error, 10.0)' not in metrics_table['sql']
+            if migrate_metrics:
+                conn.execute(f'CREATE TEMP TABLE reconstruction_metrics_old AS SELECT {_METRICS_BASE_COLUMNS} FROM reconstruction_metrics')
+                conn.execute('DROP TABLE reconstruction_metrics')
             
             # Reconstruction metrics table (detailed statistics for dense reconstruction)
+            # Density, registration rate and grade are generated from the measured
+            # values, so they stay consistent however a row is written
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS reconstruction_metrics (
                     scan_id TEXT PRIMARY KEY,
                     quality_mode TEXT NOT NULL,
                     sparse_points INTEGER,
                     dense_points INTEGER,
-                    density_multiplier REAL,
+                    density_multiplier REAL GENERATED ALWAYS AS (
+                        CAST(dense_points AS REAL) / MAX(sparse_points, 1)
+                    ) STORED,
                     registered_images INTEGER,
                     total_images INTEGER,
-                    registration_rate REAL,
+                    registration_rate REAL GENERATED ALWAYS AS (
+                        CAST(registered_images AS REAL) / MAX(total_images, 1)
+                    ) STORED,
                     avg_reproj_error REAL,
                     avg_track_length REAL,
                     coverage_percentage REAL,
                     processing_time_seconds REAL,
-                    quality_grade TEXT,
+                    -- A missing reprojection error counts as 10 px, never a good grade
+                    quality_grade TEXT GENERATED ALWAYS AS (
+                        CASE
+                            WHEN density_multiplier >= 50 AND registration_rate >= 0.8 AND COALESCE(avg_reproj_error, 10.0) < 1.0 THEN 'A+'
+                            WHEN density_multiplier >= 30 AND registration_rate >= 0.7 AND COALESCE(avg_reproj_error, 10.0) < 1.5 THEN 'A'
+                            WHEN density_multiplier >= 20 AND registration_rate >= 0.6 AND COALESCE(avg_reproj_error, 10.0) < 2.0 THEN 'B'
+                            WHEN density_multiplier >= 10 AND registration_rate >= 0.5 THEN 'C'
+                            ELSE 'D'
+                        END
+                    ) STORED,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     FOREIGN KEY (scan_id) REFERENCES scans (id)
                 )
             ''')
             
+            if migrate_metrics:
+                conn.execute(f'INSERT INTO reconstruction_metrics ({_METRICS_BASE_COLUMNS}) SELECT {_METRICS_BASE_COLUMNS} FROM reconstruction_metrics_old')
+                conn.execute('DROP TABLE reconstruction_metrics_old')
+                logger.info("✅ Migrated reconstruction_metrics to generated columns")
+            
+            # Cascade scan deletes to the per-scan tables. A trigger rather than
+            # ON DELETE CASCADE: it also covers existing databases without a
+            # table rebuild and works on connections without foreign_keys=ON
+            conn.execute('''
+                CREATE TRIGGER IF NOT EXISTS trg_scan_cascade AFTER DELETE ON scans
+                BEGIN
+                    DELETE FROM scan_technical_details WHERE scan_id = OLD.id;
+                    DELETE FROM reconstruction_metrics WHERE scan_id = OLD.id;
+                    DELETE FROM processing_jobs WHERE scan_id = OLD.id;
+                END
+            ''')
+            
+            # Give the planner row statistics for the indexes above
+            conn.execute('ANALYZE')
+            
             conn.commit()
             logger.info("Database initialized successfully")
             
         except Exception as e:
-            logger.error(f"Database initialization failed: {e}")
+            logger.error("Database initialization failed: %s", e)
             conn.rollback()
             raise
-        finally:
-            conn.close()
+    
+    def _create_index(self, conn, name: str, target: str):
+        """Create an index, logging instead of failing schema init if it can't be built"""
+        try:
+            conn.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {target}')
+        except sqlite3.OperationalError as e:
+            logger.warning("Could not create index %s: %s", name, e)
     
     # User methods
     def create_user(self, email: str, name: Optional[str] = None) -> str:
@@ -196,28 +407,23 @@ class Database:
         user_id = str(uuid.uuid4())
         conn = self.get_connection()
         try:
-            conn.execute(
-                'INSERT INTO users (id, email, name) VALUES (?, ?, ?)',
-                (user_id, email, name)
-            )
-            conn.commit()
-            logger.info(f"Created user: {email}")
+            with conn:
+                conn.execute(
+                    'INSERT INTO users (id, email, name) VALUES (?, ?, ?)',
+                    (user_id, email, name)
+                )
+            logger.info("Created user: %s", email)
             return user_id
         except sqlite3.IntegrityError:
             # User already exists, return existing user_id
             row = conn.execute('SELECT id FROM users WHERE email = ?', (email,)).fetchone()
             return row['id'] if row else user_id
-        finally:
-            conn.close()
     
     def get_user_by_email(self, email: str) -> Optional[Dict]:
         """Get user by email"""
         conn = self.get_connection()
-        try:
-            row = conn.execute('SELECT * FROM users WHERE email = ?', (email,)).fetchone()
-            return dict(row) if row else None
-        finally:
-            conn.close()
+        row = conn.execute('SELECT * FROM users WHERE email = ?', (email,)).fetchone()
+        return row
     
     # Project methods
     def create_project(self, user_id: str, name: str, description: str = "", 
@@ -225,41 +431,29 @@ class Database:
         """Create a new project"""
         project_id = str(uuid.uuid4())
         conn = self.get_connection()
-        try:
+        with conn:
             conn.execute('''
-                INSERT INTO projects (id, user_id, name, description, location, space_type, project_type)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
+                INSERT INTO projects (id, user_id, name, description, location, space_type, project_type, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
             ''', (project_id, user_id, name, description, location, space_type, project_type))
-            conn.commit()
-            logger.info(f"Created project: {name}")
+            logger.info("Created project: %s", name)
             return project_id
-        finally:
-            conn.close()
     
     def get_user_projects(self, user_id: str) -> List[Dict]:
         """Get all projects for a user"""
         conn = self.get_connection()
-        try:
-            rows = conn.execute('''
-                SELECT p.*, COUNT(s.id) as scan_count
-                FROM projects p
-                LEFT JOIN scans s ON p.id = s.project_id
-                WHERE p.user_id = ?
-                GROUP BY p.id
-                ORDER BY p.updated_at DESC
-            ''', (user_id,)).fetchall()
-            return [dict(row) for row in rows]
-        finally:
-            conn.close()
+        rows = conn.execute('''
+            SELECT * FROM projects
+            WHERE user_id = ?
+            ORDER BY updated_at DESC
+        ''', (user_id,)).fetchall()
+        return rows
     
     def get_project(self, project_id: str) -> Optional[Dict]:
         """Get a project by ID"""
         conn = self.get_connection()
-        try:
-            row = conn.execute('SELECT * FROM projects WHERE id = ?', (project_id,)).fetchone()
-            return dict(row) if row else None
-        finally:
-            conn.close()
+        row = conn.execute('SELECT * FROM projects WHERE id = ?', (project_id,)).fetchone()
+        return row
     
     # Scan methods
     def create_scan(self, project_id: str, name: str, video_filename: str, 
@@ -267,7 +461,7 @@ class Database:
         """Create a new scan"""
         scan_id = str(uuid.uuid4())
         conn = self.get_connection()
-        try:
+        with conn:
             conn.execute('''
                 INSERT INTO scans (id, project_id, name, video_filename, video_size, processing_quality)
                 VALUES (?, ?, ?, ?, ?, ?)
@@ -278,92 +472,57 @@ class Database:
                 'UPDATE projects SET updated_at = CURRENT_TIMESTAMP WHERE id = ?',
                 (project_id,)
             )
-            
-            conn.commit()
-            logger.info(f"Created scan: {name}")
+            logger.info("Created scan: %s", name)
             return scan_id
-        finally:
-            conn.close()
     
     def get_project_scans(self, project_id: str) -> List[Dict]:
         """Get all scans for a project"""
         conn = self.get_connection()
-        try:
-            rows = conn.execute('''
-                SELECT s.*, 
-                       std.point_count,
-                       std.processing_time_seconds,
-                       std.file_size_bytes
-                FROM scans s
-                LEFT JOIN scan_technical_details std ON s.id = std.scan_id
-                WHERE s.project_id = ?
-                ORDER BY s.created_at DESC
-            ''', (project_id,)).fetchall()
-            return [dict(row) for row in rows]
-        finally:
-            conn.close()
+        rows = conn.execute('''
+            SELECT s.*, 
+                   std.point_count,
+                   std.processing_time_seconds,
+                   std.file_size_bytes
+            FROM scans s
+            LEFT JOIN scan_technical_details std ON s.id = std.scan_id
+            WHERE s.project_id = ?
+            ORDER BY s.created_at DESC
+        ''', (project_id,)).fetchall()
+        return rows
     
     def get_scan(self, scan_id: str) -> Optional[Dict]:
         """Get a scan by ID"""
         conn = self.get_connection()
-        try:
-            row = conn.execute('SELECT * FROM scans WHERE id = ?', (scan_id,)).fetchone()
-            return dict(row) if row else None
-        finally:
-            conn.close()
+        row = conn.execute(_SQL_GET_SCAN, (scan_id,)).fetchone()
+        return row
     
     def update_scan_status(self, scan_id: str, status: str, thumbnail_path: str = None):
         """Update scan status and optionally thumbnail path"""
         conn = self.get_connection()
-        try:
+        with conn:
             if thumbnail_path:
-                conn.execute(
-                    'UPDATE scans SET status = ?, thumbnail_path = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?',
-                    (status, thumbnail_path, scan_id)
-                )
+                conn.execute(_SQL_UPDATE_SCAN_STATUS_THUMBNAIL, (status, thumbnail_path, scan_id))
             else:
-                conn.execute(
-                    'UPDATE scans SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?',
-                    (status, scan_id)
-                )
-            conn.commit()
-        finally:
-            conn.close()
+                conn.execute(_SQL_UPDATE_SCAN_STATUS, (status, scan_id))
     
     def delete_scan(self, scan_id: str):
         """Delete a scan and its technical details"""
         conn = self.get_connection()
-        try:
-            # Delete technical details first (foreign key constraint)
-            conn.execute('DELETE FROM scan_technical_details WHERE scan_id = ?', (scan_id,))
-            
-            # Delete processing jobs
-            conn.execute('DELETE FROM processing_jobs WHERE scan_id = ?', (scan_id,))
-            
-            # Delete the scan
+        with conn:
+            # trg_scan_cascade removes technical details, metrics and jobs
             conn.execute('DELETE FROM scans WHERE id = ?', (scan_id,))
-            
-            conn.commit()
-            logger.info(f"Deleted scan and related data: {scan_id}")
-        finally:
-            conn.close()
+            logger.info("Deleted scan and related data: %s", scan_id)
     
     # Technical details methods
     def save_scan_technical_details(self, scan_id: str, technical_data: Dict[str, Any]):
         """Save technical details from COLMAP processing"""
         conn = self.get_connection()
-        try:
+        with conn:
             # Convert nested objects to JSON
-            processing_stages = json.dumps(technical_data.get('processing_stages', []))
-            results = json.dumps(technical_data.get('results', {}))
+            processing_stages = _json_dumps(technical_data.get('processing_stages', []))
+            results = _json_dumps(technical_data.get('results', {}))
             
-            conn.execute('''
-                INSERT OR REPLACE INTO scan_technical_details 
-                (scan_id, point_count, camera_count, feature_count, processing_time_seconds,
-                 resolution, file_size_bytes, reconstruction_error, coverage_percentage,
-                 processing_stages, results)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
+            conn.execute(_SQL_SAVE_TECHNICAL_DETAILS, (
                 scan_id,
                 technical_data.get('point_count'),
                 technical_data.get('camera_count'),
@@ -378,144 +537,90 @@ class Database:
             ))
             
             # Update scan status to completed
-            conn.execute(
-                'UPDATE scans SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?',
-                ('completed', scan_id)
-            )
-            
-            conn.commit()
-            logger.info(f"Saved technical details for scan: {scan_id}")
-        finally:
-            conn.close()
+            conn.execute(_SQL_UPDATE_SCAN_STATUS, ('completed', scan_id))
+            logger.info("Saved technical details for scan: %s", scan_id)
     
     def get_scan_details(self, scan_id: str) -> Optional[Dict]:
         """Get complete scan details including technical data"""
         conn = self.get_connection()
-        try:
-            row = conn.execute('''
-                SELECT s.*,
-                       p.name as project_name,
-                       p.location as project_location,
-                       std.point_count,
-                       std.camera_count,
-                       std.feature_count,
-                       std.processing_time_seconds,
-                       std.resolution,
-                       std.file_size_bytes,
-                       std.reconstruction_error,
-                       std.coverage_percentage,
-                       std.processing_stages,
-                       std.results
-                FROM scans s
-                LEFT JOIN projects p ON s.project_id = p.id
-                LEFT JOIN scan_technical_details std ON s.id = std.scan_id
-                WHERE s.id = ?
-            ''', (scan_id,)).fetchone()
-            
-            if not row:
-                return None
-            
-            data = dict(row)
-            
-            # Parse JSON fields
-            if data.get('processing_stages'):
-                data['processing_stages'] = json.loads(data['processing_stages'])
-            if data.get('results'):
-                data['results'] = json.loads(data['results'])
-            
-            return data
-        finally:
-            conn.close()
+        row = conn.execute(_SQL_GET_SCAN_DETAILS, (scan_id,)).fetchone()
+        
+        if not row:
+            return None
+        
+        data = row
+        
+        # Parse JSON fields
+        if data.get('processing_stages'):
+            data['processing_stages'] = _json_loads(data['processing_stages'])
+        if data.get('results'):
+            data['results'] = _json_loads(data['results'])
+        
+        return data
     
     def get_all_jobs(self) -> Dict:
         """Get all processing jobs"""
+        return {job['job_id']: job for job in self.iter_all_jobs()}
+    
+    def iter_all_jobs(self) -> Iterator[Dict]:
+        """Yield processing jobs newest first, one row at a time
+        
+        Runs on the calling thread's connection, so consume it on that thread.
+        """
         conn = self.get_connection()
+        # Plain tuples: each row is unpacked straight into the job dict
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        cursor.execute('''
+            SELECT job_id, scan_id, status, progress, current_stage, message, started_at
+            FROM processing_jobs
+            ORDER BY started_at DESC
+        ''')
         try:
-            rows = conn.execute('SELECT * FROM processing_jobs ORDER BY started_at DESC').fetchall()
-            jobs = {}
-            for row in rows:
-                job_data = dict(row)
-                jobs[job_data['job_id']] = {
-                    'job_id': job_data['job_id'],
-                    'scan_id': job_data['scan_id'],
-                    'status': job_data['status'],
-                    'progress': job_data['progress'],
-                    'current_stage': job_data['current_stage'],
-                    'message': job_data['message'],
-                    'created_at': job_data['started_at']
+            for job_id, scan_id, status, progress, current_stage, message, started_at in cursor:
+                yield {
+                    'job_id': job_id,
+                    'scan_id': scan_id,
+                    'status': status,
+                    'progress': progress,
+                    'current_stage': current_stage,
+                    'message': message,
+                    'created_at': started_at
                 }
-            return jobs
         finally:
-            conn.close()
+            cursor.close()
     
     def update_job_status(self, job_id: str, status: str, job_data: Dict = None):
         """Update or create job status"""
         conn = self.get_connection()
-        try:
-            # Check if job exists
-            existing = conn.execute('SELECT job_id FROM processing_jobs WHERE job_id = ?', (job_id,)).fetchone()
-            
-            if existing:
-                # Update existing job
-                conn.execute('''
-                    UPDATE processing_jobs 
-                    SET status = ?, progress = ?, current_stage = ?, message = ?
-                    WHERE job_id = ?
-                ''', (
-                    status, 
-                    job_data.get('progress', 0) if job_data else 0,
-                    job_data.get('current_stage', 'Unknown') if job_data else 'Unknown',
-                    job_data.get('message', '') if job_data else '',
-                    job_id
-                ))
-            else:
-                # Insert new job
-                conn.execute('''
-                    INSERT INTO processing_jobs 
-                    (job_id, scan_id, status, progress, current_stage, message)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (
-                    job_id,
-                    job_data.get('scan_id', '') if job_data else '',
-                    status,
-                    job_data.get('progress', 0) if job_data else 0,
-                    job_data.get('current_stage', 'Unknown') if job_data else 'Unknown',
-                    job_data.get('message', '') if job_data else ''
-                ))
-            
-            conn.commit()
-        finally:
-            conn.close()
+        with conn:
+            # scan_id is only taken from the first insert; later ticks keep it
+            conn.execute(_SQL_UPSERT_JOB, (
+                job_id,
+                job_data.get('scan_id', '') if job_data else '',
+                status,
+                job_data.get('progress', 0) if job_data else 0,
+                job_data.get('current_stage', 'Unknown') if job_data else 'Unknown',
+                job_data.get('message', '') if job_data else ''
+            ))
     
     def get_all_projects(self) -> List[Dict]:
         """Get all projects"""
         conn = self.get_connection()
-        try:
-            rows = conn.execute('''
-                SELECT p.*, COUNT(s.id) as scan_count
-                FROM projects p
-                LEFT JOIN scans s ON p.id = s.project_id
-                GROUP BY p.id
-                ORDER BY p.updated_at DESC
-            ''').fetchall()
-            return [dict(row) for row in rows]
-        finally:
-            conn.close()
+        rows = conn.execute('''
+            SELECT * FROM projects
+            ORDER BY updated_at DESC
+        ''').fetchall()
+        return rows
     
     def get_project_by_id(self, project_id: str) -> Optional[Dict]:
         """Get a project by ID with scan count"""
         conn = self.get_connection()
-        try:
-            row = conn.execute('''
-                SELECT p.*, COUNT(s.id) as scan_count
-                FROM projects p
-                LEFT JOIN scans s ON p.id = s.project_id
-                WHERE p.id = ?
-                GROUP BY p.id
-            ''', (project_id,)).fetchone()
-            return dict(row) if row else None
-        finally:
-            conn.close()
+        row = conn.execute('''
+            SELECT * FROM projects
+            WHERE id = ?
+        ''', (project_id,)).fetchone()
+        return row
     
     def setup_demo_data(self) -> Dict:
         """Setup demo data with completed scans"""
@@ -523,54 +628,42 @@ class Database:
             # Clean up any duplicate demo data first
             cleanup_result = self.cleanup_duplicate_demos()
             if cleanup_result.get("deleted_projects", 0) > 0:
-                logger.info(f"🧹 Cleaned up {cleanup_result.get('deleted_projects')} duplicate projects before setup")
-            
-            # Create demo user
-            demo_email = "demo@metroa.app"
-            user = self.get_user_by_email(demo_email)
-            
-            if not user:
-                user_id = self.create_user(demo_email, "Demo User")
-            else:
-                user_id = user['id']
+                logger.info("🧹 Cleaned up %s duplicate projects before setup", cleanup_result.get('deleted_projects'))
             
-            # Check if demo project already exists
             conn = self.get_connection()
-            try:
-                existing_project = conn.execute(
-                    'SELECT id FROM projects WHERE user_id = ? AND name = ?',
-                    (user_id, "Reconstruction Test Project 1")
-                ).fetchone()
+            
+            # Fetch-or-create the demo user in one statement
+            with conn:
+                user_id = conn.execute('''
+                    INSERT INTO users (id, email, name) VALUES (?, ?, ?)
+                    ON CONFLICT(email) DO UPDATE SET name = excluded.name
+                    RETURNING id
+                ''', (str(uuid.uuid4()), "demo@metroa.app", "Demo User")).fetchone()['id']
+            
+            # Check if demo project already exists, fetching its scan IDs alongside
+            existing_rows = conn.execute('''
+                SELECT p.id AS project_id, s.id AS scan_id
+                FROM projects p
+                LEFT JOIN scans s ON s.project_id = p.id
+                WHERE p.user_id = ? AND p.name = ?
+            ''', (user_id, "Reconstruction Test Project 1")).fetchall()
+            
+            if existing_rows:
+                logger.info("Demo data already exists, skipping setup")
+                project_id = existing_rows[0]['project_id']
+                scan_ids = [row['scan_id'] for row in existing_rows
+                            if row['project_id'] == project_id and row['scan_id']]
                 
-                if existing_project:
-                    logger.info("Demo data already exists, skipping setup")
-                    # Get scan IDs for existing project
-                    scan_rows = conn.execute(
-                        'SELECT id FROM scans WHERE project_id = ?',
-                        (existing_project['id'],)
-                    ).fetchall()
-                    scan_ids = [row['id'] for row in scan_rows]
-                    
-                    return {
-                        "status": "success",
-                        "message": "Demo data already exists",
-                        "user_id": user_id,
-                        "project_id": existing_project['id'],
-                        "scan_ids": scan_ids,
-                        "skipped": True
-                    }
-            finally:
-                conn.close()
-            
-            # Create demo project
-            project_id = self.create_project(
-                user_id=user_id,
-                name="Reconstruction Test Project 1",
-                description="Demo Metroa Labs 3D reconstructions from demo-resources",
-                location="Demo Location",
-                space_type="indoor",
-                project_type="architecture"
-            )
+                return {
+                    "status": "success",
+                    "message": "Demo data already exists",
+                    "user_id": user_id,
+                    "project_id": project_id,
+                    "scan_ids": scan_ids,
+                    "skipped": True
+                }
+            
+            project_id = str(uuid.uuid4())
             
             # Demo scan configurations
             demo_scans = [
@@ -586,42 +679,66 @@ class Database:
                 }
             ]
             
-            scan_ids = []
-            for scan_config in demo_scans:
-                # Create scan
-                scan_id = self.create_scan(
-                    project_id=project_id,
-                    name=scan_config["name"],
-                    video_filename=scan_config["video_filename"],
-                    video_size=scan_config["video_size"],
-                    processing_quality="high"
-                )
-                
-                # Save technical details
-                self.save_scan_technical_details(scan_id, {
-                    "point_count": scan_config["point_count"],
-                    "camera_count": scan_config["camera_count"],
-                    "feature_count": scan_config["point_count"] * 8,
-                    "processing_time_seconds": 245.6,
-                    "resolution": "1920x1080",
-                    "file_size_bytes": scan_config["video_size"],
-                    "reconstruction_error": 0.38,
-                    "coverage_percentage": 96.4,
-                    "processing_stages": [
-                        {"name": "Frame Extraction", "status": "completed", "duration": "1.2s", "frames_extracted": scan_config["camera_count"]},
-                        {"name": "Feature Detection", "status": "completed", "duration": "58.4s", "features_detected": scan_config["point_count"] * 8},
-                        {"name": "Feature Matching", "status": "completed", "duration": "1.5m", "matches": scan_config["point_count"] * 3},
-                        {"name": "Sparse Reconstruction", "status": "completed", "duration": "2.1m", "points": scan_config["point_count"]},
-                        {"name": "Dense Reconstruction", "status": "completed", "duration": "0.6m", "points": scan_config["point_count"] * 3}
-                    ],
-                    "results": {
-                        "point_cloud_url": f"/demo-resources/{scan_config['ply_file']}",
-                        "mesh_url": f"/demo-resources/{scan_config['glb_file']}",
-                        "thumbnail_url": f"/demo-resources/{scan_config['thumbnail']}"
-                    }
-                })
+            scan_ids = [str(uuid.uuid4()) for _ in demo_scans]
+            scans_params = []
+            tech_params = []
+            for scan_id, scan_config in zip(scan_ids, demo_scans):
+                scans_params.append((
+                    scan_id,
+                    project_id,
+                    scan_config["name"],
+                    'completed',
+                    scan_config["video_filename"],
+                    scan_config["video_size"],
+                    "high"
+                ))
                 
-                scan_ids.append(scan_id)
+                processing_stages = [
+                    {"name": "Frame Extraction", "status": "completed", "duration": "1.2s", "frames_extracted": scan_config["camera_count"]},
+                    {"name": "Feature Detection", "status": "completed", "duration": "58.4s", "features_detected": scan_config["point_count"] * 8},
+                    {"name": "Feature Matching", "status": "completed", "duration": "1.5m", "matches": scan_config["point_count"] * 3},
+                    {"name": "Sparse Reconstruction", "status": "completed", "duration": "2.1m", "points": scan_config["point_count"]},
+                    {"name": "Dense Reconstruction", "status": "completed", "duration": "0.6m", "points": scan_config["point_count"] * 3}
+                ]
+                results = {
+                    "point_cloud_url": f"/demo-resources/{scan_config['ply_file']}",
+                    "mesh_url": f"/demo-resources/{scan_config['glb_file']}",
+                    "thumbnail_url": f"/demo-resources/{scan_config['thumbnail']}"
+                }
+                tech_params.append((
+                    scan_id,
+                    scan_config["point_count"],
+                    scan_config["camera_count"],
+                    scan_config["point_count"] * 8,
+                    245.6,
+                    "1920x1080",
+                    scan_config["video_size"],
+                    0.38,
+                    96.4,
+                    _json_dumps(processing_stages),
+                    _json_dumps(results)
+                ))
+            
+            # Project, scans and technical details land in one transaction so a
+            # failure never leaves a half-built demo project behind
+            with conn:
+                conn.execute('''
+                    INSERT INTO projects (id, user_id, name, description, location, space_type, project_type, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ''', (
+                    project_id,
+                    user_id,
+                    "Reconstruction Test Project 1",
+                    "Demo Metroa Labs 3D reconstructions from demo-resources",
+                    "Demo Location",
+                    "indoor",
+                    "architecture"
+                ))
+                conn.executemany('''
+                    INSERT INTO scans (id, project_id, name, status, video_filename, video_size, processing_quality)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', scans_params)
+                conn.executemany(_SQL_SAVE_TECHNICAL_DETAILS, tech_params)
             
             logger.info("✅ Demo data setup completed")
             return {
@@ -633,7 +750,7 @@ class Database:
             }
             
         except Exception as e:
-            logger.error(f"Failed to setup demo data: {e}")
+            logger.error("Failed to setup demo data: %s", e)
             raise
     
     def cleanup_duplicate_demos(self) -> Dict:
@@ -653,12 +770,10 @@ class Database:
             
             # Find all demo projects for this user with scan counts
             demo_projects = conn.execute('''
-                SELECT p.id, p.name, p.created_at, COUNT(s.id) as scan_count
-                FROM projects p
-                LEFT JOIN scans s ON p.id = s.project_id
-                WHERE p.user_id = ?
-                GROUP BY p.id
-                ORDER BY p.created_at DESC
+                SELECT id, name, created_at, scan_count
+                FROM projects
+                WHERE user_id = ?
+                ORDER BY created_at DESC
             ''', (user_id,)).fetchall()
             
             deleted_scans = 0
@@ -676,7 +791,7 @@ class Database:
                     ).fetchall()
                     if scans and scans[0]['name'] and 'dollhouse' in scans[0]['name'].lower():
                         keep_project_id = proj['id']
-                        logger.info(f"Found project to keep: {proj['name']} (ID: {proj['id']}) with 1 scan")
+                        logger.info("Found project to keep: %s (ID: %s) with 1 scan", proj['name'], proj['id'])
                         break
             
             # If no project with 1 scan found, keep the one with the fewest scans
@@ -684,39 +799,32 @@ class Database:
                 # Sort by scan count ascending
                 sorted_projects = sorted(demo_projects, key=lambda p: p['scan_count'] if p['scan_count'] else 0)
                 keep_project_id = sorted_projects[0]['id']
-                logger.info(f"Keeping project with fewest scans: {sorted_projects[0]['name']} (ID: {keep_project_id})")
+                logger.info("Keeping project with fewest scans: %s (ID: %s)", sorted_projects[0]['name'], keep_project_id)
             
             # Delete projects with 5 scans (or any project that's not the one to keep)
-            for proj in demo_projects:
-                scan_count = proj['scan_count'] if proj['scan_count'] else 0
+            delete_projects = [
+                proj for proj in demo_projects
+                if (proj['scan_count'] or 0) == 5 or proj['id'] != keep_project_id
+            ]
+            
+            if delete_projects:
+                delete_ids = [proj['id'] for proj in delete_projects]
+                placeholders = ",".join("?" * len(delete_ids))
                 
-                # Delete if: has 5 scans OR is not the project we want to keep
-                if scan_count == 5 or proj['id'] != keep_project_id:
-                    # Get scan IDs for this project
-                    scan_ids = conn.execute(
-                        'SELECT id FROM scans WHERE project_id = ?',
-                        (proj['id'],)
-                    ).fetchall()
-                    
-                    for scan_row in scan_ids:
-                        scan_id = scan_row['id']
-                        # Delete related data
-                        conn.execute('DELETE FROM scan_technical_details WHERE scan_id = ?', (scan_id,))
-                        conn.execute('DELETE FROM reconstruction_metrics WHERE scan_id = ?', (scan_id,))
-                        conn.execute('DELETE FROM processing_jobs WHERE scan_id = ?', (scan_id,))
-                        deleted_scans += 1
-                    
-                    # Delete scans
-                    conn.execute('DELETE FROM scans WHERE project_id = ?', (proj['id'],))
-                    
-                    # Delete project
-                    conn.execute('DELETE FROM projects WHERE id = ?', (proj['id'],))
-                    deleted_projects += 1
-                    logger.info(f"Deleted project: {proj['name']} (ID: {proj['id']}) with {scan_count} scans")
+                # trg_scan_cascade clears technical details, metrics and jobs
+                deleted_scans = conn.execute(
+                    f'DELETE FROM scans WHERE project_id IN ({placeholders})', delete_ids
+                ).rowcount
+                deleted_projects = conn.execute(
+                    f'DELETE FROM projects WHERE id IN ({placeholders})', delete_ids
+                ).rowcount
+                
+                for proj in delete_projects:
+                    logger.info("Deleted project: %s (ID: %s) with %d scans", proj['name'], proj['id'], proj['scan_count'] or 0)
             
             conn.commit()
             
-            logger.info(f"Cleaned up {deleted_projects} duplicate projects and {deleted_scans} scans")
+            logger.info("Cleaned up %d duplicate projects and %d scans", deleted_projects, deleted_scans)
             return {
                 "status": "success",
                 "message": f"Removed {deleted_projects} duplicate projects and {deleted_scans} scans",
@@ -725,11 +833,9 @@ class Database:
                 "kept_project_id": keep_project_id
             }
         except Exception as e:
-            logger.error(f"Error cleaning up duplicates: {e}")
+            logger.error("Error cleaning up duplicates: %s", e)
             conn.rollback()
             return {"status": "error", "message": str(e), "deleted": 0}
-        finally:
-            conn.close()
     
     def force_delete_project_by_name(self, project_name: str) -> Dict:
         """Force delete a project by name and all its associated data"""
@@ -752,7 +858,7 @@ class Database:
             project_id = project['id']
             project_name_found = project['name']
             
-            logger.info(f"🗑️ Force deleting project: {project_name_found} (ID: {project_id})")
+            logger.info("🗑️ Force deleting project: %s (ID: %s)", project_name_found, project_id)
             
             # Get all scans for this project
             scan_ids = conn.execute(
@@ -771,9 +877,9 @@ class Database:
                     conn.execute('DELETE FROM reconstruction_metrics WHERE scan_id = ?', (scan_id,))
                     conn.execute('DELETE FROM processing_jobs WHERE scan_id = ?', (scan_id,))
                     deleted_scans += 1
-                    logger.info(f"  Deleted scan data: {scan_id}")
+                    logger.info("  Deleted scan data: %s", scan_id)
                 except Exception as e:
-                    logger.warning(f"  Failed to delete scan data {scan_id}: {e}")
+                    logger.warning("  Failed to delete scan data %s: %s", scan_id, e)
             
             # Delete all scans
             conn.execute('DELETE FROM scans WHERE project_id = ?', (project_id,))
@@ -783,7 +889,7 @@ class Database:
             
             conn.commit()
             
-            logger.info(f"✅ Force deleted project '{project_name_found}' with {deleted_scans} scans")
+            logger.info("✅ Force deleted project '%s' with %d scans", project_name_found, deleted_scans)
             
             return {
                 "status": "success",
@@ -794,15 +900,13 @@ class Database:
             }
         except Exception as e:
             conn.rollback()
-            logger.error(f"❌ Failed to force delete project '{project_name}': {e}")
+            logger.error("❌ Failed to force delete project '%s': %s", project_name, e)
             return {
                 "status": "error",
                 "message": f"Failed to delete project: {str(e)}",
                 "deleted_projects": 0,
                 "deleted_scans": 0
             }
-        finally:
-            conn.close()
     
     def save_reconstruction_metrics(self, scan_id: str, metrics: Dict[str, Any]):
         """
@@ -823,75 +927,33 @@ class Database:
         """
         conn = self.get_connection()
         try:
-            # Calculate derived metrics
-            sparse_points = metrics.get('sparse_points', 0)
             dense_points = metrics.get('dense_points', 0)
-            density_multiplier = dense_points / max(sparse_points, 1)
-            
-            registered_images = metrics.get('registered_images', 0)
-            total_images = metrics.get('total_images', 0)
-            registration_rate = registered_images / max(total_images, 1)
             
-            # Calculate quality grade
-            quality_grade = self._calculate_quality_grade(metrics)
-            
-            # Insert or replace metrics
-            conn.execute('''
-                INSERT OR REPLACE INTO reconstruction_metrics 
-                (scan_id, quality_mode, sparse_points, dense_points, density_multiplier,
-                 registered_images, total_images, registration_rate, avg_reproj_error,
-                 avg_track_length, coverage_percentage, processing_time_seconds, quality_grade)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
+            # Insert or replace metrics; density, registration rate and grade
+            # are generated columns
+            density_multiplier = conn.execute(_SQL_SAVE_RECONSTRUCTION_METRICS, (
                 scan_id,
                 metrics.get('quality_mode', 'medium'),
-                sparse_points,
+                metrics.get('sparse_points', 0),
                 dense_points,
-                density_multiplier,
-                registered_images,
-                total_images,
-                registration_rate,
-                metrics.get('avg_reproj_error', 0.0),
+                metrics.get('registered_images', 0),
+                metrics.get('total_images', 0),
+                metrics.get('avg_reproj_error'),
                 metrics.get('avg_track_length', 0.0),
                 metrics.get('coverage_percentage', 0.0),
-                metrics.get('processing_time_seconds', 0.0),
-                quality_grade
-            ))
+                metrics.get('processing_time_seconds', 0.0)
+            )).fetchone()['density_multiplier']
             conn.commit()
-            logger.info(f"Saved reconstruction metrics for scan {scan_id}: {dense_points} dense points ({density_multiplier:.1f}x multiplier)")
+            logger.info("Saved reconstruction metrics for scan %s: %s dense points (%.1fx multiplier)", scan_id, dense_points, density_multiplier)
         except Exception as e:
-            logger.error(f"Failed to save reconstruction metrics: {e}")
-        finally:
-            conn.close()
+            logger.error("Failed to save reconstruction metrics: %s", e)
+            conn.rollback()
     
     def get_reconstruction_metrics(self, scan_id: str) -> Optional[Dict]:
         """Get reconstruction metrics for a scan"""
         conn = self.get_connection()
-        try:
-            row = conn.execute('SELECT * FROM reconstruction_metrics WHERE scan_id = ?', (scan_id,)).fetchone()
-            if row:
-                return dict(row)
-            return None
-        finally:
-            conn.close()
-    
-    def _calculate_quality_grade(self, metrics: Dict[str, Any]) -> str:
-        """Calculate quality grade based on metrics"""
-        density_multiplier = metrics.get('dense_points', 0) / max(metrics.get('sparse_points', 1), 1)
-        registration_rate = metrics.get('registered_images', 0) / max(metrics.get('total_images', 1), 1)
-        avg_reproj_error = metrics.get('avg_reproj_error', 10.0)
-        
-        # Grade based on multiple factors
-        if density_multiplier >= 50 and registration_rate >= 0.8 and avg_reproj_error < 1.0:
-            return "A+"
-        elif density_multiplier >= 30 and registration_rate >= 0.7 and avg_reproj_error < 1.5:
-            return "A"
-        elif density_multiplier >= 20 and registration_rate >= 0.6 and avg_reproj_error < 2.0:
-            return "B"
-        elif density_multiplier >= 10 and registration_rate >= 0.5:
-            return "C"
-        else:
-            return "D"
+        row = conn.execute('SELECT * FROM reconstruction_metrics WHERE scan_id = ?', (scan_id,)).fetchone()
+        return row
 
 # Global database instance
 db = Database()
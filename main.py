@@ -12,6 +12,8 @@ import logging
 import os
 import sqlite3
 import json
+import shutil
+import time
 from datetime import datetime
 import uuid
 import subprocess
@@ -121,7 +123,6 @@ def process_colmap_reconstruction(scan_id: str, video_path: str, quality: str):
     - high → high_quality
     - ultra → ultra_openmvs
     """
-    import time
     start_time = time.time()
     
     try:
@@ -888,7 +889,7 @@ async def get_reconstruction_statistics(scan_id: str):
             "registered_images": metrics.get("registered_images", 0),
             "total_images": metrics.get("total_images", 0),
             "registration_rate": round(metrics.get("registration_rate", 0.0), 3),
-            "avg_reproj_error": round(metrics.get("avg_reproj_error", 0.0), 3),
+            "avg_reproj_error": round(metrics.get("avg_reproj_error") or 0.0, 3),
             "avg_track_length": round(metrics.get("avg_track_length", 0.0), 2),
             "coverage_percentage": round(metrics.get("coverage_percentage", 0.0), 1),
             "processing_time_seconds": round(metrics.get("processing_time_seconds", 0.0), 1),
@@ -924,7 +925,6 @@ async def delete_scan(scan_id: str):
         conn.close()
         
         # Delete associated files
-        import shutil
         scan_upload_dir = Path(f"/workspace/data/uploads/{scan_id}")
         scan_results_dir = Path(f"/workspace/data/results/{scan_id}")
         
@@ -1115,7 +1115,6 @@ async def calibrate_scale(
         # Determine point IDs - use positions if provided, otherwise use IDs
         if point1_position and point2_position:
             # New method: find nearest points by position
-            import json
             import numpy as np
             
             try:
@@ -1218,7 +1217,6 @@ async def add_measurement(
     - point positions as JSON arrays "[x, y, z]" (new)
     """
     try:
-        import json
         import numpy as np
         
         scan_path = Path(f"/workspace/data/results/{scan_id}")
@@ -1475,8 +1473,6 @@ async def force_delete_project(project_name: str = Form(...)):
         if result.get("status") == "success":
             project_id = result.get("project_id")
             if project_id:
-                import shutil
-                from pathlib import Path
                 
                 # Delete upload directories for all scans in this project
                 conn = get_db_connection()
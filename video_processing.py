@@ -195,26 +195,35 @@ def convert_360_to_perspective_frames(
                 (0, -45),   # Down-Front
             ]
         
-        frame_count = 0
+        logger.info(f"Extracting {len(views)} views: " + ", ".join(f"yaw={yaw}°/pitch={pitch}°" for yaw, pitch in views))
         
-        # Extract frames at target FPS
+        # Decode the video once and fan each sampled frame out to every view:
+        # fps runs first so only kept frames are split and projected by v360
+        labels = [f"[s{view_idx}]" for view_idx in range(len(views))]
+        filters = [f"[0:v]fps={target_fps},split={len(views)}{''.join(labels)}"]
         for view_idx, (yaw, pitch) in enumerate(views):
-            logger.info(f"Extracting view {view_idx + 1}/{len(views)}: yaw={yaw}°, pitch={pitch}°")
-            
-            # Use ffmpeg v360 filter to convert equirectangular to perspective
-            cmd = [
-                'ffmpeg',
-                '-i', video_path,
-                '-vf', f"v360=e:flat:yaw={yaw}:pitch={pitch}:w={resolution}:h={resolution},fps={target_fps}",
+            filters.append(
+                f"{labels[view_idx]}v360=e:flat:yaw={yaw}:pitch={pitch}:w={resolution}:h={resolution}[v{view_idx}]"
+            )
+        
+        # v360 is slice-threaded: give the graph every core so the per-pixel
+        # remaps of all views run in parallel on each sampled frame
+        cmd = [
+            'ffmpeg', '-i', video_path,
+            '-filter_complex_threads', str(os.cpu_count() or 1),
+            '-filter_complex', ';'.join(filters)
+        ]
+        for view_idx in range(len(views)):
+            cmd.extend([
+                '-map', f"[v{view_idx}]",
                 '-q:v', '2',  # High quality
                 f"{output_dir}/frame_%04d_view{view_idx}.jpg"
-            ]
-            
-            subprocess.run(cmd, check=True, capture_output=True)
-            
-            # Count extracted frames for this view
-            view_frames = len(list(output_path.glob(f"frame_*_view{view_idx}.jpg")))
-            frame_count += view_frames
+            ])
+        
+        subprocess.run(cmd, check=True, capture_output=True)
+        
+        # Count extracted frames across all views
+        frame_count = len(list(output_path.glob("frame_*_view*.jpg")))
         
         logger.info(f"✅ Extracted {frame_count} perspective frames from 360° video")
         return frame_count